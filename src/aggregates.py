@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import math
+from bisect import insort
+from collections import defaultdict
+from datetime import datetime
+from typing import TYPE_CHECKING, Tuple, TypedDict
+from cache import load_pickle, save_pickle
+
+if TYPE_CHECKING:
+    from stravalib.model import SummaryActivity
+
+AGGREGATES_FILE = "aggregates.pkl"
+METERS_PER_MILE = 1609.34
+
+# (total_activities, total_miles, avg_weekly_miles, miles_per_month, pace_trend,
+#  weekly_mileage_trend, cadence_trend, heart_rate_trend)
+YearlyData = Tuple[
+    int, float, float, list[float], list[float], list[float], list[float], list[float]
+]
+
+
+class ActivityRecord(TypedDict):
+    id: int
+    start: datetime
+    start_local: datetime
+    miles: float
+    pace: int
+    cadence: float | None
+    heart_rate: float | None
+
+
+def to_record(activity: SummaryActivity) -> ActivityRecord:
+    distance = activity.distance or 0
+    moving_time = activity.moving_time or 0
+    miles = distance / METERS_PER_MILE
+    return {
+        "id": activity.id,
+        "start": activity.start_date,
+        "start_local": activity.start_date_local,
+        "miles": miles,
+        "pace": round(moving_time / miles) if miles else 0,
+        "cadence": activity.average_cadence * 2 if activity.average_cadence else None,
+        "heart_rate": (
+            activity.average_heartrate
+            if activity.average_heartrate and activity.average_heartrate > 120
+            else None
+        ),
+    }
+
+
+class YearlyAggregates:
+    # Folded in per activity, so a refresh only costs the activities that changed
+    def __init__(self, year: int):
+        self.year = year
+        self.records: dict[int, ActivityRecord] = {}
+        self.order: list[tuple[datetime, int]] = []
+        self.total_miles = 0.0
+        self.miles_per_month = [0.0] * 12
+        self.weekly_miles: dict[tuple[int, int], float] = defaultdict(float)
+        self.reconciled_at: datetime | None = None
+        self._series: tuple | None = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["weekly_miles"] = dict(self.weekly_miles)
+        state["_series"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.weekly_miles = defaultdict(float, self.weekly_miles)
+
+    @property
+    def latest_start(self) -> datetime | None:
+        if not self.order:
+            return None
+        return self.records[self.order[-1][1]]["start"]
+
+    def _fold(self, record: ActivityRecord, sign: int) -> None:
+        miles = sign * record["miles"]
+        date = record["start_local"]
+        self.total_miles += miles
+        self.miles_per_month[date.month - 1] += miles
+        # ISO year + week prevents collisions across years
+        iso_year, iso_week, _ = date.isocalendar()
+        week = (iso_year, iso_week)
+        self.weekly_miles[week] += miles
+        if sign < 0 and abs(self.weekly_miles[week]) < 1e-9:
+            del self.weekly_miles[week]
+        self._series = None
+
+    def apply(self, activity: SummaryActivity) -> None:
+        if activity.id in self.records:
+            self.update(activity)
+            return
+        record = to_record(activity)
+        self.records[record["id"]] = record
+        insort(self.order, (record["start_local"], record["id"]))
+        self._fold(record, 1)
+
+    def update(self, activity: SummaryActivity) -> None:
+        if activity.id not in self.records:
+            self.apply(activity)
+            return
+        record = to_record(activity)
+        if record == self.records[activity.id]:
+            return
+        self.remove(activity.id)
+        self.apply(activity)
+
+    def remove(self, activity_id: int) -> None:
+        record = self.records.pop(activity_id, None)
+        if record is None:
+            return
+        self.order.remove((record["start_local"], activity_id))
+        self._fold(record, -1)
+
+    def reconcile(self, activities: list[SummaryActivity]) -> None:
+        seen = set()
+        for activity in activities:
+            seen.add(activity.id)
+            self.update(activity)
+        for activity_id in list(self.records):
+            if activity_id not in seen:
+                self.remove(activity_id)
+
+    def summary(self, now: datetime) -> YearlyData:
+        if self._series is None:
+            ordered = [self.records[activity_id] for _, activity_id in self.order]
+            self._series = (
+                [r["pace"] for r in ordered],
+                [round(self.weekly_miles[k], 2) for k in sorted(self.weekly_miles)],
+                [r["cadence"] for r in ordered if r["cadence"]],
+                [r["heart_rate"] for r in ordered if r["heart_rate"]],
+            )
+        pace_trend, weekly_mileage_trend, cadence_trend, heart_rate_trend = self._series
+        # Not the ISO week: Dec 29-31 can fall in week 1 of the next year
+        weeks_ytd = max(1, math.ceil(now.timetuple().tm_yday / 7))
+        total_miles = max(0.0, self.total_miles)
+
+        return (
+            len(self.records),
+            round(total_miles, 2),
+            round(total_miles / weeks_ytd, 2),
+            [round(max(0.0, m), 2) for m in self.miles_per_month],
+            list(pace_trend),
+            list(weekly_mileage_trend),
+            list(cadence_trend),
+            list(heart_rate_trend),
+        )
+
+    def save(self) -> None:
+        save_pickle(AGGREGATES_FILE, self)
+
+
+def load_aggregates(year: int) -> YearlyAggregates:
+    aggregates = load_pickle(AGGREGATES_FILE)
+    if not isinstance(aggregates, YearlyAggregates) or aggregates.year != year:
+        return YearlyAggregates(year)
+    return aggregates
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import os
+import pickle
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, TypedDict
+from PIL import Image
+from PIL.Image import Image as PILImage
+
+if TYPE_CHECKING:
+    from data import DashboardData
+
+# STRAVA_FRAME_CACHE keeps a run (e.g. src/perf.py) out of the real caches
+CACHE_DIR = Path(
+    os.environ.get("STRAVA_FRAME_CACHE") or Path(__file__).parent.parent / "cache"
+)
+SNAPSHOT_FILE = "snapshot.pkl"
+# Bump whenever the shape of DashboardData changes
+SNAPSHOT_VERSION = 5
+
+
+class Snapshot(TypedDict):
+    data: DashboardData
+    fetched_at: datetime
+    size: tuple[int, int]
+    frames: list[PILImage]
+
+
+def _write_atomic(path: Path, payload: bytes) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(payload)
+    os.replace(tmp, path)
+
+
+def save_pickle(name: str, obj) -> None:
+    CACHE_DIR.mkdir(exist_ok=True)
+    _write_atomic(CACHE_DIR / name, pickle.dumps(obj))
+
+
+def load_pickle(name: str, default=None):
+    try:
+        with open(CACHE_DIR / name, "rb") as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return default
+
+
+def frame_path(index: int) -> Path:
+    return CACHE_DIR / f"frame_{index}.png"
+
+
+def save_snapshot(
+    data: DashboardData, fetched_at: datetime, frames: list[PILImage]
+) -> None:
+    # Frames first, so metadata never points at frames from an older snapshot
+    CACHE_DIR.mkdir(exist_ok=True)
+    for i, frame in enumerate(frames):
+        tmp = frame_path(i).with_suffix(".tmp.png")
+        frame.save(tmp, compress_level=1)
+        os.replace(tmp, frame_path(i))
+    save_pickle(
+        SNAPSHOT_FILE,
+        {
+            "data": data,
+            "fetched_at": fetched_at,
+            "size": frames[0].size if frames else (0, 0),
+            "count": len(frames),
+            "version": SNAPSHOT_VERSION,
+        },
+    )
+
+
+def load_snapshot() -> Snapshot | None:
+    meta = load_pickle(SNAPSHOT_FILE)
+    if not meta or meta.get("version") != SNAPSHOT_VERSION:
+        return None
+    try:
+        frames = []
+        for i in range(meta["count"]):
+            with Image.open(frame_path(i)) as frame:
+                # Keep the rendered mode; paletted and 1-bit frames stay small
+                frames.append(frame.copy())
+    except (OSError, KeyError):
+        return None
+    return {
+        "data": meta["data"],
+        "fetched_at": meta["fetched_at"],
+        "size": meta["size"],
+        "frames": frames,
+    }
@@ -1,4 +1,7 @@
+import ctypes
+import ctypes.util
 import os
+import struct
 import tomllib
 import re
 import sys
@@ -6,10 +9,33 @@ import sys
 os.environ["SILENCE_TOKEN_WARNINGS"] = "true"
 
 _SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
-_CONFIG_PATH = os.path.join(_SCRIPT_DIR, "..", "config.toml")
+# STRAVA_FRAME_CONFIG points a run (e.g. src/perf.py) at another config file
+_CONFIG_PATH = os.environ.get("STRAVA_FRAME_CONFIG") or os.path.join(
+    _SCRIPT_DIR, "..", "config.toml"
+)
 
 HEX_COLOR_RE = re.compile(r"^#[0-9a-fA-F]{6}$")
 
+# Settings that reload() leaves alone: credentials, the window size, and what
+# decides how the process is laid out at startup
+RESTART_SETTINGS = frozenset(
+    {
+        "STRAVA_CLIENT_ID",
+        "STRAVA_CLIENT_SECRET",
+        "STRAVA_REFRESH_TOKEN",
+        "WIDTH",
+        "HEIGHT",
+        "REQUEST_TIMEOUT",
+        "SPLIT_PROCESSES",
+        "MEMORY_PROFILE",
+        "MEMORY_BUDGET_MB",
+    }
+)
+# inotify(7) event masks and the fixed part of each event it reports
+_IN_CLOSE_WRITE = 0x08
+_IN_MOVED_TO = 0x80
+_INOTIFY_EVENT = struct.Struct("iIII")
+
 _DEFAULTS = {
     "display": {
         "accent_color": "#FC4C02",
@@ -17,19 +43,31 @@ _DEFAULTS = {
         "full_screen": False,
         "width": 320,
         "height": 240,
+        "trend_smoothing": 0,
+        "monthly_chart": "bars",
+        "rotate_seconds": 0,
+        "output_mode": "RGB",
     },
     "app": {
         "refresh_time_minutes": 15,
+        "request_timeout_seconds": 20,
+        "split_processes": False,
     },
     "sleep_mode": {
         "enabled": False,
         "start_hour": 22,
         "end_hour": 8,
     },
+    "memory": {
+        "profile": False,
+        "budget_mb": 0,
+    },
 }
 
 _errors: list[str] = []
 _warnings: list[str] = []
+# Restart-only settings whose new value reload() has already reported
+_pending_restart: dict = {}
 
 
 def _get(config: dict, section: str, key: str):
@@ -84,6 +122,14 @@ def _validate_int(
     return value
 
 
+def _validate_choice(value, section: str, key: str, choices: tuple[str, ...]) -> str:
+    if value not in choices:
+        options = ", ".join(repr(c) for c in choices)
+        _errors.append(f"[{section}] '{key}' must be one of {options}, got {value!r}")
+        return _DEFAULTS[section][key]
+    return value
+
+
 def _validate_str(value, section: str, key: str) -> str:
     if not isinstance(value, str) or not value.strip():
         _errors.append(f"[{section}] '{key}' must be a non-empty string")
@@ -91,84 +137,148 @@ def _validate_str(value, section: str, key: str) -> str:
     return value
 
 
-try:
-    with open(_CONFIG_PATH, "rb") as _f:
-        _config = tomllib.load(_f)
-except FileNotFoundError:
-    print(f"ERROR: config.toml not found at {_CONFIG_PATH}", file=sys.stderr)
-    sys.exit(1)
-except tomllib.TOMLDecodeError as e:
-    print(f"ERROR: config.toml is not valid TOML: {e}", file=sys.stderr)
-    sys.exit(1)
+def _parse(config: dict) -> dict:
+    # Problems go to _errors and _warnings rather than being raised
+    _client_id = _require(config, "strava", "client_id")
+    _client_secret = _require(config, "strava", "client_secret")
+    _refresh_token = _require(config, "strava", "refresh_token")
 
-_client_id = _require(_config, "strava", "client_id")
-_client_secret = _require(_config, "strava", "client_secret")
-_refresh_token = _require(_config, "strava", "refresh_token")
+    STRAVA_CLIENT_ID: str = _validate_str(_client_id, "strava", "client_id")
+    STRAVA_CLIENT_SECRET: str = _validate_str(_client_secret, "strava", "client_secret")
+    STRAVA_REFRESH_TOKEN: str = _validate_str(_refresh_token, "strava", "refresh_token")
 
-STRAVA_CLIENT_ID: str = _validate_str(_client_id, "strava", "client_id")
-STRAVA_CLIENT_SECRET: str = _validate_str(_client_secret, "strava", "client_secret")
-STRAVA_REFRESH_TOKEN: str = _validate_str(_refresh_token, "strava", "refresh_token")
+    ACCENT_COLOR: str = _validate_hex_color(
+        _get(config, "display", "accent_color"), "display", "accent_color"
+    )
+    DARK_MODE: bool = _validate_bool(
+        _get(config, "display", "dark_mode"), "display", "dark_mode"
+    )
+    FULL_SCREEN: bool = _validate_bool(
+        _get(config, "display", "full_screen"), "display", "full_screen"
+    )
+    WIDTH: int = _validate_int(
+        _get(config, "display", "width"),
+        "display",
+        "width",
+        min_val=1,
+    )
+    HEIGHT: int = _validate_int(
+        _get(config, "display", "height"),
+        "display",
+        "height",
+        min_val=1,
+    )
 
-ACCENT_COLOR: str = _validate_hex_color(
-    _get(_config, "display", "accent_color"), "display", "accent_color"
-)
-DARK_MODE: bool = _validate_bool(
-    _get(_config, "display", "dark_mode"), "display", "dark_mode"
-)
-FULL_SCREEN: bool = _validate_bool(
-    _get(_config, "display", "full_screen"), "display", "full_screen"
-)
-WIDTH: int = _validate_int(
-    _get(_config, "display", "width"),
-    "display",
-    "width",
-    min_val=1,
-)
-HEIGHT: int = _validate_int(
-    _get(_config, "display", "height"),
-    "display",
-    "height",
-    min_val=1,
-)
+    TREND_SMOOTHING: int = _validate_int(
+        _get(config, "display", "trend_smoothing"),
+        "display",
+        "trend_smoothing",
+        min_val=0,
+        max_val=50,
+    )
 
-REFRESH_TIME: int = (
-    _validate_int(
-        _get(_config, "app", "refresh_time_minutes"),
+    MONTHLY_CHART: str = _validate_choice(
+        _get(config, "display", "monthly_chart"),
+        "display",
+        "monthly_chart",
+        ("bars", "heatmap"),
+    )
+
+    ROTATE_SECONDS: int = _validate_int(
+        _get(config, "display", "rotate_seconds"),
+        "display",
+        "rotate_seconds",
+        min_val=0,
+        max_val=3600,
+    )
+
+    OUTPUT_MODE: str = _validate_choice(
+        _get(config, "display", "output_mode"),
+        "display",
+        "output_mode",
+        ("RGB", "P", "L", "1"),
+    )
+
+    REFRESH_TIME: int = (
+        _validate_int(
+            _get(config, "app", "refresh_time_minutes"),
+            "app",
+            "refresh_time_minutes",
+            min_val=_DEFAULTS["app"]["refresh_time_minutes"],
+            max_val=1440,
+        )
+        * 60
+        * 1000
+    )
+
+    REQUEST_TIMEOUT: int = _validate_int(
+        _get(config, "app", "request_timeout_seconds"),
         "app",
-        "refresh_time_minutes",
-        min_val=_DEFAULTS["app"]["refresh_time_minutes"],
-        max_val=1440,
+        "request_timeout_seconds",
+        min_val=1,
+        max_val=300,
     )
-    * 60
-    * 1000
-)
 
-SLEEP_MODE_ENABLED: bool = _validate_bool(
-    _get(_config, "sleep_mode", "enabled"), "sleep_mode", "enabled"
-)
+    SPLIT_PROCESSES: bool = _validate_bool(
+        _get(config, "app", "split_processes"), "app", "split_processes"
+    )
 
-if SLEEP_MODE_ENABLED:
-    SLEEP_MODE_START: int = _validate_int(
-        _get(_config, "sleep_mode", "start_hour"),
-        "sleep_mode",
-        "start_hour",
-        min_val=0,
-        max_val=23,
+    SLEEP_MODE_ENABLED: bool = _validate_bool(
+        _get(config, "sleep_mode", "enabled"), "sleep_mode", "enabled"
+    )
+
+    if SLEEP_MODE_ENABLED:
+        SLEEP_MODE_START: int = _validate_int(
+            _get(config, "sleep_mode", "start_hour"),
+            "sleep_mode",
+            "start_hour",
+            min_val=0,
+            max_val=23,
+        )
+        SLEEP_MODE_END: int = _validate_int(
+            _get(config, "sleep_mode", "end_hour"),
+            "sleep_mode",
+            "end_hour",
+            min_val=0,
+            max_val=23,
+        )
+        if SLEEP_MODE_START == SLEEP_MODE_END:
+            _errors.append(
+                "[sleep_mode] 'start_hour' and 'end_hour' cannot be the same value"
+            )
+    else:
+        SLEEP_MODE_START: int = _DEFAULTS["sleep_mode"]["start_hour"]
+        SLEEP_MODE_END: int = _DEFAULTS["sleep_mode"]["end_hour"]
+
+    MEMORY_PROFILE: bool = _validate_bool(
+        _get(config, "memory", "profile"), "memory", "profile"
     )
-    SLEEP_MODE_END: int = _validate_int(
-        _get(_config, "sleep_mode", "end_hour"),
-        "sleep_mode",
-        "end_hour",
+    MEMORY_BUDGET_MB: int = _validate_int(
+        _get(config, "memory", "budget_mb"),
+        "memory",
+        "budget_mb",
         min_val=0,
-        max_val=23,
+        max_val=4096,
     )
-    if SLEEP_MODE_START == SLEEP_MODE_END:
-        _errors.append(
-            "[sleep_mode] 'start_hour' and 'end_hour' cannot be the same value"
-        )
-else:
-    SLEEP_MODE_START: int = _DEFAULTS["sleep_mode"]["start_hour"]
-    SLEEP_MODE_END: int = _DEFAULTS["sleep_mode"]["end_hour"]
+
+    return {name: value for name, value in locals().items() if name.isupper()}
+
+
+def _read() -> dict:
+    with open(_CONFIG_PATH, "rb") as f:
+        return tomllib.load(f)
+
+
+try:
+    _config = _read()
+except FileNotFoundError:
+    print(f"ERROR: config.toml not found at {_CONFIG_PATH}", file=sys.stderr)
+    sys.exit(1)
+except tomllib.TOMLDecodeError as e:
+    print(f"ERROR: config.toml is not valid TOML: {e}", file=sys.stderr)
+    sys.exit(1)
+
+globals().update(_parse(_config))
 
 if _warnings:
     print("Config warnings:", file=sys.stderr)
@@ -180,3 +290,81 @@ if _errors:
     for e in _errors:
         print(f"  ✗ {e}", file=sys.stderr)
     sys.exit(1)
+
+
+def reload() -> set[str] | None:
+    # None if the file is unreadable or invalid; then nothing is rebound
+    _errors.clear()
+    _warnings.clear()
+    try:
+        config = _read()
+    except (OSError, tomllib.TOMLDecodeError) as e:
+        print(f"config.toml not reloaded: {e}", file=sys.stderr)
+        return None
+
+    settings = _parse(config)
+    if _errors:
+        print("Config errors — keeping the previous settings:", file=sys.stderr)
+        for e in _errors:
+            print(f"  ✗ {e}", file=sys.stderr)
+        return None
+
+    changed = {name for name, value in settings.items() if globals()[name] != value}
+    for name in sorted(changed & RESTART_SETTINGS):
+        if _pending_restart.get(name) != settings[name]:
+            print(f"Config: {name} changes on the next restart", file=sys.stderr)
+            _pending_restart[name] = settings[name]
+    for name in RESTART_SETTINGS - changed:
+        _pending_restart.pop(name, None)
+    changed -= RESTART_SETTINGS
+    globals().update({name: settings[name] for name in changed})
+    return changed
+
+
+def _inotify_watch(directory: str) -> int | None:
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+    except (OSError, AttributeError):
+        return None
+    if fd < 0:
+        return None
+    # Editors often save by renaming a new file over the old one
+    mask = _IN_CLOSE_WRITE | _IN_MOVED_TO
+    if libc.inotify_add_watch(fd, os.fsencode(directory), mask) < 0:
+        os.close(fd)
+        return None
+    return fd
+
+
+class ConfigWatcher:
+    def __init__(self, path: str = _CONFIG_PATH):
+        self.path = os.path.abspath(path)
+        self.name = os.fsencode(os.path.basename(self.path))
+        self.fd = _inotify_watch(os.path.dirname(self.path))
+        self.mtime = self._mtime()
+
+    def _mtime(self) -> int | None:
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def changed(self) -> bool:
+        if self.fd is None:
+            mtime = self._mtime()
+            changed, self.mtime = mtime != self.mtime, mtime
+            return changed
+
+        changed = False
+        while True:
+            try:
+                events = os.read(self.fd, 4096)
+            except BlockingIOError:
+                return changed
+            offset = 0
+            while offset < len(events):
+                length = _INOTIFY_EVENT.unpack_from(events, offset)[3]
+                start = offset + _INOTIFY_EVENT.size
+                changed |= events[start : start + length].rstrip(b"\0") == self.name
+                offset = start + length
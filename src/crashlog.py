@@ -0,0 +1,38 @@
+import logging
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+LOGS_DIR = Path(__file__).parent.parent / "logs"
+# Set by supervisor.py in the dashboard's environment to how many times it
+# has been restarted
+RESTART_ENV = "STRAVA_FRAME_RESTARTS"
+CRASH_LOG = "crash.log"
+# The store never grows past (1 + CRASH_LOG_BACKUPS) * CRASH_LOG_MAX_BYTES
+CRASH_LOG_MAX_BYTES = 256 * 1024
+CRASH_LOG_BACKUPS = 3
+
+_logger: logging.Logger | None = None
+
+
+def _crash_logger() -> logging.Logger:
+    global _logger
+    if _logger is None:
+        LOGS_DIR.mkdir(exist_ok=True)
+        handler = RotatingFileHandler(
+            LOGS_DIR / CRASH_LOG,
+            maxBytes=CRASH_LOG_MAX_BYTES,
+            backupCount=CRASH_LOG_BACKUPS,
+        )
+        handler.setFormatter(logging.Formatter("=== %(asctime)s ===\n%(message)s\n"))
+        _logger = logging.getLogger("strava_frame.crash")
+        _logger.propagate = False
+        _logger.addHandler(handler)
+    return _logger
+
+
+def record_crash(report: str) -> None:
+    try:
+        _crash_logger().error(report.rstrip())
+    except OSError:
+        # A full or read-only SD card must not turn one crash into two
+        pass
@@ -1,15 +1,46 @@
+from __future__ import annotations
+
+import calendar
 import logging
 import re
-from config import STRAVA_CLIENT_ID, STRAVA_CLIENT_SECRET, STRAVA_REFRESH_TOKEN
-from stravalib.client import Client
-from stravalib.model import SummaryActivity
-from datetime import datetime, timedelta
-from typing import Tuple, TypedDict
-from tenacity import retry, stop_after_attempt, wait_exponential
-from collections import defaultdict
+import sys
+import time
+from bisect import bisect_right
+from concurrent.futures import Future, ThreadPoolExecutor
+from config import (
+    STRAVA_CLIENT_ID,
+    STRAVA_CLIENT_SECRET,
+    STRAVA_REFRESH_TOKEN,
+    REQUEST_TIMEOUT,
+)
+from datetime import date, datetime, timedelta
+from typing import TYPE_CHECKING, Tuple, TypedDict
+from cache import load_pickle, save_pickle
+from aggregates import METERS_PER_MILE, YearlyAggregates, YearlyData, load_aggregates
+from efforts import BestEffortIndex, PRSummary, load_efforts
+from history import HistoryRollups, HistorySummary, load_rollups
+
+# stravalib (and pydantic under it) and tenacity take seconds to import on a
+# Pi 2B, so they are only imported by the fetch worker, never at startup.
+if TYPE_CHECKING:
+    from stravalib.client import Client
+    from stravalib.model import SummaryActivity
 
 logging.getLogger("stravalib").setLevel(logging.ERROR)
 
+IMPORT_BUDGET_SECONDS = 5.0
+# Refresh the access token this many seconds before Strava says it expires
+TOKEN_EXPIRY_MARGIN = 5 * 60
+TOKEN_FILE = "token.pkl"
+# Upper bound on Strava requests in flight at once; also the session pool size
+MAX_CONCURRENT_REQUESTS = 4
+ACTIVITIES_PER_PAGE = 200
+# Years shown in the year-over-year comparison
+YEAR_OVER_YEAR_YEARS = 10
+# Once the history has been reconciled (or imported), its TTL refresh only
+# relists activities from this long before the last reconcile
+HISTORY_OVERLAP = timedelta(days=30)
+
 
 class LatestActivity(TypedDict):
     miles: float
@@ -18,12 +49,85 @@ class LatestActivity(TypedDict):
     title: str
     date: datetime
     medal: str | None
+    polyline: str | None
+
+
+# (total_activities, total_miles, avg_weekly_miles, miles_per_month, pace_trend,
+#  weekly_mileage_trend, cadence_trend, heart_rate_trend, latest_activity, streak,
+#  history, records)
+DashboardData = Tuple[
+    int,
+    float,
+    float,
+    list[float],
+    list[float],
+    list[float],
+    list[float],
+    list[float],
+    LatestActivity,
+    int,
+    HistorySummary,
+    PRSummary,
+]
 
-
-METERS_PER_MILE = 1609.34
-streak_cache = -1
 latest_activity_cache: LatestActivity = {}
-latest_activity_cache
+aggregates: YearlyAggregates | None = None
+rollups: HistoryRollups | None = None
+best_efforts: BestEffortIndex | None = None
+# id of the newest activity seen by the last probe; False until the first probe
+newest_activity_id: int | None | bool = False
+
+strava_client: Client | None = None
+access_token: str | None = None
+token_expires_at = 0
+refresh_token = STRAVA_REFRESH_TOKEN
+request_pool: ThreadPoolExecutor | None = None
+
+
+class DataSource:
+    # A TTL of None means refetched only when invalidated
+    def __init__(self, name: str, ttl: timedelta | None):
+        self.name = name
+        self.ttl = ttl
+        self.fetched_at: datetime | None = None
+        self.invalid = True
+
+    def invalidate(self) -> None:
+        self.invalid = True
+
+    def is_stale(self, now: datetime) -> bool:
+        if self.invalid or self.fetched_at is None:
+            return True
+        return self.ttl is not None and now - self.fetched_at >= self.ttl
+
+    def mark_fresh(self, now: datetime) -> None:
+        self.fetched_at = now
+        self.invalid = False
+
+
+# The latest activity and its PR only change when a new activity appears. The
+# yearly totals and history rollups are updated incrementally from the
+# newest-activity probe and reconciled (picking up edits and deletes) when
+# their TTLs run out: the yearly totals against the whole year, the rollups
+# against the last few weeks unless nothing has been reconciled yet. The
+# trends share the yearly listing, and the streak and year-over-year view are
+# computed locally from the history rollups.
+DATA_SOURCES = {
+    "latest": DataSource("latest", ttl=None),
+    "pr": DataSource("pr", ttl=None),
+    "yearly": DataSource("yearly", ttl=timedelta(hours=6)),
+    "history": DataSource("history", ttl=timedelta(days=7)),
+}
+
+
+def invalidate_all() -> None:
+    for source in DATA_SOURCES.values():
+        source.invalidate()
+
+
+def invalidate_new_activity() -> None:
+    for name in ("latest", "pr"):
+        DATA_SOURCES[name].invalidate()
 
 
 def format_effort_name(name: str) -> str:
@@ -47,15 +151,85 @@ def format_effort_name(name: str) -> str:
     return name
 
 
-@retry(stop=stop_after_attempt(5), wait=wait_exponential(multiplier=2, min=2, max=32))
+def import_api_modules() -> float:
+    start = time.perf_counter()
+    import stravalib.client  # noqa: F401
+    import tenacity  # noqa: F401
+
+    elapsed = time.perf_counter() - start
+    if elapsed > IMPORT_BUDGET_SECONDS:
+        print(
+            f"Importing stravalib/tenacity took {elapsed:.1f}s "
+            f"(budget {IMPORT_BUDGET_SECONDS:.1f}s)",
+            file=sys.stderr,
+        )
+    return elapsed
+
+
+def restore_token() -> None:
+    global access_token, token_expires_at, refresh_token
+
+    saved = load_pickle(TOKEN_FILE)
+    if not isinstance(saved, dict) or saved.get("configured") != STRAVA_REFRESH_TOKEN:
+        return
+    access_token = saved["access_token"]
+    refresh_token = saved["refresh_token"]
+    token_expires_at = saved["expires_at"]
+
+
+def _new_client() -> Client:
+    from stravalib.client import Client
+    from session import get_session
+
+    return Client(
+        requests_session=get_session(REQUEST_TIMEOUT, MAX_CONCURRENT_REQUESTS)
+    )
+
+
 def get_strava_client() -> Client:
-    client = Client()
+    global strava_client
+    from tenacity import Retrying, stop_after_attempt, wait_exponential
+
+    if access_token is None:
+        restore_token()
+    token_valid = time.time() < token_expires_at - TOKEN_EXPIRY_MARGIN
+    if token_valid:
+        if strava_client is None:
+            strava_client = _new_client()
+            strava_client.access_token = access_token
+        return strava_client
+
+    for attempt in Retrying(
+        stop=stop_after_attempt(5), wait=wait_exponential(multiplier=2, min=2, max=32)
+    ):
+        with attempt:
+            return _refresh_strava_client()
+
+
+def _refresh_strava_client() -> Client:
+    global strava_client, access_token, token_expires_at, refresh_token
+
+    client = strava_client or _new_client()
     tokens = client.refresh_access_token(
         client_id=STRAVA_CLIENT_ID,
         client_secret=STRAVA_CLIENT_SECRET,
-        refresh_token=STRAVA_REFRESH_TOKEN,
+        refresh_token=refresh_token,
+    )
+    access_token = client.access_token = tokens["access_token"]
+    # Strava may rotate the refresh token; always use the most recent one
+    refresh_token = tokens.get("refresh_token") or refresh_token
+    token_expires_at = tokens.get("expires_at") or 0
+    strava_client = client
+    # Saved so a restart neither refreshes again nor loses a rotated token
+    save_pickle(
+        TOKEN_FILE,
+        {
+            "configured": STRAVA_REFRESH_TOKEN,
+            "access_token": access_token,
+            "refresh_token": refresh_token,
+            "expires_at": token_expires_at,
+        },
     )
-    client.access_token = tokens["access_token"]
     return client
 
 
@@ -79,6 +253,11 @@ def calculate_pace(meters: float, seconds: int) -> int:
     return round(seconds_per_mile)
 
 
+def local_time(activity: SummaryActivity) -> datetime:
+    # Strava marks local times as UTC
+    return activity.start_date_local.replace(tzinfo=None)
+
+
 def week_start(date: datetime) -> datetime:
     if date.tzinfo is not None:
         date = date.replace(tzinfo=None)
@@ -87,20 +266,8 @@ def week_start(date: datetime) -> datetime:
     )
 
 
-def streak_cache_is_stale() -> bool:
-    date = latest_activity_cache.get("date")
-    if date is None:
-        return False
-    previous_week = week_start(datetime.now()) - timedelta(weeks=1)
-    return week_start(date) < previous_week
-
-
-def calculate_streak(activities: list[SummaryActivity]) -> int:
-    if not activities:
-        return 0
-
-    active_weeks = set(week_start(a.start_date_local) for a in activities)
-    current_week = week_start(datetime.now())
+def streak_from_weeks(active_weeks: set[date], now: datetime) -> int:
+    current_week = week_start(now).date()
 
     if current_week not in active_weeks:
         current_week -= timedelta(weeks=1)
@@ -112,139 +279,288 @@ def calculate_streak(activities: list[SummaryActivity]) -> int:
     return streak
 
 
+def get_request_pool() -> ThreadPoolExecutor:
+    global request_pool
+    if request_pool is None:
+        request_pool = ThreadPoolExecutor(
+            max_workers=MAX_CONCURRENT_REQUESTS, thread_name_prefix="strava"
+        )
+    return request_pool
+
+
+def get_activity_page(
+    page: int, after: datetime | None = None, per_page: int = ACTIVITIES_PER_PAGE
+) -> list[SummaryActivity]:
+    from stravalib.model import SummaryActivity
+
+    client = get_strava_client()
+    params = {"page": page, "per_page": per_page}
+    if after is not None:
+        # Naive datetimes are treated as UTC, matching stravalib
+        params["after"] = calendar.timegm(after.utctimetuple())
+    raw = client.protocol.get("/athlete/activities", check_for_errors=True, **params)
+    return [
+        SummaryActivity.model_validate({**r, "bound_client": client}) for r in raw
+    ]
+
+
+class PagedActivities:
+    # The first wave is submitted here so several listings overlap
+    def __init__(self, after: datetime | None = None, wave: int = 1):
+        self.after = after
+        self.wave = wave
+        self.next_page = 1
+        self.futures = self._submit_wave()
+
+    def _submit_wave(self) -> list[Future]:
+        pool = get_request_pool()
+        pages = range(self.next_page, self.next_page + self.wave)
+        self.next_page += self.wave
+        return [pool.submit(get_activity_page, page, self.after) for page in pages]
+
+    def result(self) -> list[SummaryActivity]:
+        activities = []
+        while True:
+            pages = [f.result() for f in self.futures]
+            for page in pages:
+                activities.extend(page)
+            if any(len(page) < ACTIVITIES_PER_PAGE for page in pages):
+                return activities
+            self.futures = self._submit_wave()
+
+
 def get_all_activities() -> list[SummaryActivity]:
-    return list(get_strava_client().get_activities())
+    return PagedActivities(wave=MAX_CONCURRENT_REQUESTS).result()
 
 
-def get_ytd_activities() -> list[SummaryActivity]:
-    jan_first = datetime(year=datetime.now().year, month=1, day=1)
-    return list(get_strava_client().get_activities(after=jan_first))
+def get_newest_activity() -> SummaryActivity | None:
+    page = get_activity_page(1, per_page=1)
+    return page[0] if page else None
 
 
 def get_pr(activity: SummaryActivity) -> str | None:
-    detailed = get_strava_client().get_activity(activity.id)
-    gold_efforts = [e for e in (detailed.best_efforts or []) if e.pr_rank == 1]
-    if not gold_efforts:
-        return None
-    best = max(gold_efforts, key=lambda e: e.distance or 0)
-    return format_effort_name(best.name)
+    # The detail is fetched only if the summary allows a PR
+    if activity.id not in best_efforts.seen and best_efforts.could_set_pr(activity):
+        detailed = get_strava_client().get_activity(activity.id)
+        best_efforts.record(
+            activity.id,
+            activity.start_date_local.date(),
+            detailed.best_efforts or [],
+        )
+        best_efforts.save()
+    best = best_efforts.longest_pr(activity.id)
+    return format_effort_name(best["name"]) if best else None
 
 
-def parse_latest_activity(activities: list[SummaryActivity]) -> LatestActivity:
-    global new_activity_exists, latest_activity_cache
+def parse_latest_activity(
+    activities: list[SummaryActivity], pr: Future | None = None
+) -> LatestActivity:
+    # pr, if given, is an in-flight get_pr call
+    global latest_activity_cache
 
     if not activities:
-        latest_activity_cache = {
+        latest_activity_cache = summarize_activity(None)
+        return latest_activity_cache
+
+    activity = activities[-1]
+
+    if activity.id == latest_activity_cache.get("id"):
+        return latest_activity_cache
+
+    latest_activity_cache = summarize_activity(
+        activity, pr.result() if pr is not None else get_pr(activity)
+    )
+    return latest_activity_cache
+
+
+def summarize_activity(
+    activity: SummaryActivity | None,
+    pr: str | None = None,
+    as_of: datetime | None = None,
+) -> LatestActivity:
+    if activity is None:
+        return {
             "miles": 0,
             "time": "00:00",
             "pace": "00:00",
             "title": "No Activity",
-            "date": datetime.now(),
+            "date": as_of or datetime.now(),
             "medal": None,
         }
-        return latest_activity_cache
-
-    activity = activities[-1]
-
-    new_activity_exists = activity.id != latest_activity_cache.get("id")
-    if not new_activity_exists:
-        return latest_activity_cache
 
     distance = activity.distance or 0
     moving_time = activity.moving_time or 0
     miles = meters_to_miles(distance)
     pace = calculate_pace(distance, moving_time)
 
-    latest_activity_cache = {
+    return {
         "id": activity.id,
         "miles": round(miles, 2),
         "time": seconds_to_timestamp(moving_time),
         "pace": seconds_to_timestamp(pace) if pace > 0 else "00:00",
         "title": activity.name,
-        "date": activity.start_date_local,
-        "pr": get_pr(activity),
+        # Naive, so loading a snapshot does not import pydantic for its TzInfo
+        "date": local_time(activity),
+        "pr": pr,
+        "polyline": activity.map.summary_polyline if activity.map else None,
     }
-    return latest_activity_cache
-
-def parse_yearly_data(
-    activities: list[SummaryActivity],
-) -> Tuple[int, float, float, list[float], list[float], list[float], list[float], list[float]]:
-    total_miles = 0.0
-    miles_per_month = [0.0] * 12
-    pace_trend = []
-    cadence_trend = []
-    heart_rate_trend = []
 
-    weekly_miles_map = defaultdict(float)
 
+def parse_yearly_data(
+    activities: list[SummaryActivity], as_of: datetime | None = None
+) -> YearlyData:
+    as_of = as_of or datetime.now()
+    yearly = YearlyAggregates(as_of.year)
     for activity in activities:
-        miles = meters_to_miles(activity.distance or 0)
-        total_miles += miles
-
-        # Monthly
-        miles_per_month[activity.start_date_local.month - 1] += miles
-
-        # Weekly (ISO year + week prevents collisions across years)
-        iso_year, iso_week, _ = activity.start_date_local.isocalendar()
-        weekly_miles_map[(iso_year, iso_week)] += miles
+        start = local_time(activity)
+        if start.year == as_of.year and start <= as_of:
+            yearly.apply(activity)
+    return yearly.summary(as_of)
 
-        # Trends
-        pace_trend.append(
-            calculate_pace(activity.distance or 0, activity.moving_time or 0)
-        )
 
-        if activity.average_cadence:
-            cadence_trend.append(activity.average_cadence * 2)
+def dashboard_data_as_of(
+    activities: list[SummaryActivity],
+    as_of: datetime,
+    efforts: BestEffortIndex | None = None,
+) -> DashboardData:
+    # PRs come from the local index only, so no detail calls
+    efforts = efforts or BestEffortIndex()
+    past = activities[: bisect_right([local_time(a) for a in activities], as_of)]
 
-        if activity.average_heartrate and activity.average_heartrate > 120:
-            heart_rate_trend.append(activity.average_heartrate)
+    rollups = HistoryRollups()
+    for activity in past:
+        rollups.apply(activity)
 
-    # Final formatting
-    miles_per_month = [round(m, 2) for m in miles_per_month]
-
-    # Sort weeks chronologically and extract values
-    weekly_mileage_trend = [
-        round(weekly_miles_map[k], 2)
-        for k in sorted(weekly_miles_map)
-    ]
-    weeks_ytd = max(1, datetime.now().isocalendar().week)
+    latest = past[-1] if past else None
+    best = efforts.longest_pr(latest.id) if latest is not None else None
 
     return (
-        len(activities),
-        round(total_miles, 2),
-        round(total_miles / weeks_ytd, 2),
-        miles_per_month,
-        pace_trend,
-        weekly_mileage_trend,
-        cadence_trend,
-        heart_rate_trend
+        *parse_yearly_data(past, as_of),
+        summarize_activity(
+            latest, format_effort_name(best["name"]) if best else None, as_of
+        ),
+        streak_from_weeks(rollups.active_weeks(), as_of),
+        rollups.summary(YEAR_OVER_YEAR_YEARS, as_of.date()),
+        efforts.summary(as_of.date()),
     )
 
-def refresh_activities() -> Tuple[int, float, float, list[float], list[float], list[float], list[float], list[float], LatestActivity, int]:
-    global streak_cache, new_activity_exists
-
-    activities = get_ytd_activities()
 
-    latest_activity = parse_latest_activity(activities)
+def yearly_listing_is_consistent(newest: SummaryActivity | None) -> bool:
+    if newest is None:
+        return not aggregates.records
+    return bool(aggregates.order) and aggregates.order[-1][1] == newest.id
+
+
+def refresh_activities(force: bool = False) -> DashboardData:
+    # One per_page=1 probe; the rest only if it or a TTL says so
+    global newest_activity_id
+    global aggregates, rollups, best_efforts
+
+    now = datetime.now()
+    if force:
+        invalidate_all()
+
+    yearly = DATA_SOURCES["yearly"]
+    if aggregates is None or aggregates.year != now.year:
+        # A new year starts from empty aggregates and a full (short) listing
+        aggregates = load_aggregates(now.year)
+        yearly.invalidate()
+        if aggregates.reconciled_at is not None and not force:
+            yearly.mark_fresh(aggregates.reconciled_at)
+    if best_efforts is None:
+        best_efforts = load_efforts()
+    if rollups is None:
+        rollups = load_rollups()
+        if rollups.reconciled_at is not None and not force:
+            DATA_SOURCES["history"].mark_fresh(rollups.reconciled_at)
+
+    get_strava_client()
+    pool = get_request_pool()
+
+    newest = get_newest_activity()
+    newest_id = newest.id if newest is not None else None
+    if newest_id != newest_activity_id:
+        invalidate_new_activity()
+
+    this_year = []
+    if newest is not None and newest.start_date_local.year == now.year:
+        this_year = [newest]
+
+    jan_first = datetime(year=now.year, month=1, day=1)
+    ytd = None
+    delta = None
+    if yearly.is_stale(now):
+        ytd = PagedActivities(after=jan_first)
+    elif not yearly_listing_is_consistent(this_year[0] if this_year else None):
+        latest_start = aggregates.latest_start
+        if this_year and (latest_start is None or newest.start_date > latest_start):
+            delta = PagedActivities(after=latest_start or jan_first)
+        else:
+            # The newest aggregated activity was deleted or moved
+            ytd = PagedActivities(after=jan_first)
+
+    pr = None
+    if this_year and DATA_SOURCES["pr"].is_stale(now):
+        pr = pool.submit(get_pr, newest)
+
+    history = None
+    history_since = None
+    if DATA_SOURCES["history"].is_stale(now):
+        if rollups.reconciled_at is None or force:
+            history = PagedActivities(wave=MAX_CONCURRENT_REQUESTS)
+        else:
+            history_since = (rollups.reconciled_at - HISTORY_OVERLAP).date()
+            # A day early, since the listing filters on UTC start times
+            history = PagedActivities(
+                after=datetime.combine(history_since, datetime.min.time())
+                - timedelta(days=1)
+            )
+
+    if DATA_SOURCES["latest"].is_stale(now):
+        # Drop the cached id so a refetch after a TTL or force is not skipped
+        latest_activity_cache.pop("id", None)
+    latest_activity = parse_latest_activity(this_year, pr)
+    DATA_SOURCES["latest"].mark_fresh(now)
+    if pr is not None:
+        DATA_SOURCES["pr"].mark_fresh(now)
+
+    if ytd is not None:
+        activities = ytd.result()
+        aggregates.reconcile(activities)
+        aggregates.reconciled_at = now
+        aggregates.save()
+        rollups.reconcile(activities, since=jan_first.date())
+        yearly.mark_fresh(now)
+    elif delta is not None:
+        for activity in delta.result():
+            aggregates.apply(activity)
+            rollups.apply(activity)
+        aggregates.save()
     total_activities, total_miles, avg_weekly_miles, miles_per_month, pace_trend, weekly_mileage_trend, cadence_trend, heart_rate_trend = (
-        parse_yearly_data(activities)
+        aggregates.summary(now)
     )
 
-    if new_activity_exists:
-        new_activity_exists = False
-        streak_cache = calculate_streak(get_all_activities())
-    elif streak_cache_is_stale():
-        streak_cache = 0
+    if history is not None:
+        rollups.reconcile(history.result(), since=history_since)
+        rollups.reconciled_at = now
+        DATA_SOURCES["history"].mark_fresh(now)
+    if ytd is not None or delta is not None or history is not None:
+        rollups.save()
+    streak = streak_from_weeks(rollups.active_weeks(), now)
+
+    newest_activity_id = newest_id
 
     return (
         total_activities,
         total_miles,
         avg_weekly_miles,
         list(miles_per_month),
-        pace_trend, 
+        pace_trend,
         weekly_mileage_trend,
         cadence_trend,
         heart_rate_trend,
         latest_activity,
-        streak_cache,
+        streak,
+        rollups.summary(YEAR_OVER_YEAR_YEARS, now.date()),
+        best_efforts.summary(now.date()),
     )
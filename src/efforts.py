@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+from datetime import date
+from typing import TYPE_CHECKING, TypedDict
+from cache import load_pickle, save_pickle
+
+if TYPE_CHECKING:
+    from stravalib.model import BestEffort, SummaryActivity
+
+EFFORTS_FILE = "efforts.pkl"
+# Strava's best-effort names and their distances in meters
+STANDARD_DISTANCES = {
+    "400m": 400.0,
+    "1/2 mile": 804.67,
+    "1K": 1000.0,
+    "1 mile": 1609.34,
+    "2 mile": 3218.69,
+    "5K": 5000.0,
+    "10K": 10000.0,
+    "15K": 15000.0,
+    "10 mile": 16093.4,
+    "20K": 20000.0,
+    "Half-Marathon": 21097.5,
+    "30K": 30000.0,
+    "Marathon": 42195.0,
+    "50K": 50000.0,
+}
+
+
+class Effort(TypedDict):
+    name: str
+    meters: float
+    seconds: int
+    activity_id: int
+    date: date
+
+
+class PRSummary(TypedDict):
+    # Fastest known effort per distance, shortest distance first
+    bests: list[Effort]
+    pr_count: int
+    pr_count_this_year: int
+    latest: Effort | None
+
+
+class BestEffortIndex:
+    # Only knows what it has seen; Strava's pr_rank stays the authority
+    def __init__(self):
+        self.bests: dict[str, Effort] = {}
+        self.prs: list[Effort] = []
+        self.seen: set[int] = set()
+
+    def record(
+        self, activity_id: int, day: date, efforts: list[BestEffort]
+    ) -> list[Effort]:
+        if activity_id in self.seen:
+            return self.prs_for(activity_id)
+        self.seen.add(activity_id)
+
+        for effort in efforts:
+            name = (effort.name or "").strip()
+            if not effort.elapsed_time:
+                continue
+            entry: Effort = {
+                "name": name,
+                "meters": STANDARD_DISTANCES.get(name, float(effort.distance or 0)),
+                "seconds": int(effort.elapsed_time),
+                "activity_id": activity_id,
+                "date": day,
+            }
+            best = self.bests.get(name)
+            if effort.pr_rank == 1:
+                self.prs.append(entry)
+                self.bests[name] = entry
+            elif best is None or entry["seconds"] < best["seconds"]:
+                self.bests[name] = entry
+        return self.prs_for(activity_id)
+
+    def prs_for(self, activity_id: int) -> list[Effort]:
+        return [pr for pr in self.prs if pr["activity_id"] == activity_id]
+
+    def longest_pr(self, activity_id: int) -> Effort | None:
+        return max(self.prs_for(activity_id), key=lambda e: e["meters"], default=None)
+
+    def could_set_pr(self, activity: SummaryActivity) -> bool:
+        # No PR over a distance it never covered at max_speed
+        if activity.id in self.seen:
+            return bool(self.prs_for(activity.id))
+        if activity.pr_count == 0:
+            return False
+        distance = activity.distance or 0
+        covered = [
+            (name, meters)
+            for name, meters in STANDARD_DISTANCES.items()
+            if meters <= distance
+        ]
+        if not covered:
+            return False
+        if not activity.max_speed:
+            return True
+        for name, meters in covered:
+            best = self.bests.get(name)
+            if best is None or meters / activity.max_speed < best["seconds"]:
+                return True
+        return False
+
+    def summary(self, as_of: date) -> PRSummary:
+        prs = [pr for pr in self.prs if pr["date"] <= as_of]
+        # Only PRs and current bests are kept; the fastest of those up to as_of
+        # is the best the index knew of at the time
+        bests: dict[str, Effort] = {}
+        for effort in prs + list(self.bests.values()):
+            best = bests.get(effort["name"])
+            if effort["date"] <= as_of and (
+                best is None or effort["seconds"] < best["seconds"]
+            ):
+                bests[effort["name"]] = effort
+        return {
+            "bests": sorted(bests.values(), key=lambda e: e["meters"]),
+            "pr_count": len(prs),
+            "pr_count_this_year": sum(
+                1 for pr in prs if pr["date"].year == as_of.year
+            ),
+            "latest": max(prs, key=lambda e: (e["date"], e["meters"]), default=None),
+        }
+
+    def save(self) -> None:
+        save_pickle(EFFORTS_FILE, self)
+
+
+def load_efforts() -> BestEffortIndex:
+    efforts = load_pickle(EFFORTS_FILE)
+    if not isinstance(efforts, BestEffortIndex):
+        return BestEffortIndex()
+    return efforts
@@ -0,0 +1,173 @@
+import ctypes
+import mmap
+import os
+from datetime import datetime
+from PIL import Image
+from PIL.Image import Image as PILImage
+
+MAGIC = b"SFB1"
+HEADER_SIZE = 128
+PALETTE_SIZE = 768
+# Frame mode -> layout in the buffer. RGB is padded to RGBX, which Pillow can
+# map in place; packed 1-bit frames are the one layout it has to unpack.
+LAYOUTS = {"RGB": "RGBX", "P": "P", "L": "L", "1": "1"}
+MODES = tuple(LAYOUTS)
+
+
+class Header(ctypes.Structure):
+    _fields_ = [
+        ("magic", ctypes.c_char * 4),
+        # Odd while a write is in progress; readers recheck it after a blit
+        ("seq", ctypes.c_uint64),
+        ("bank", ctypes.c_uint32),
+        ("bank_size", ctypes.c_uint64),
+        ("width", ctypes.c_uint32),
+        ("height", ctypes.c_uint32),
+        ("mode", ctypes.c_uint32),
+        ("views", ctypes.c_uint32),
+        ("fetched_at", ctypes.c_double),
+        ("failures", ctypes.c_uint32),
+        # Written by the display, read by the renderer and fetcher
+        ("want_width", ctypes.c_uint32),
+        ("want_height", ctypes.c_uint32),
+        ("refresh_requests", ctypes.c_uint32),
+    ]
+
+
+def frame_bytes(mode: str, width: int, height: int) -> int:
+    raw = LAYOUTS[mode]
+    if raw == "1":
+        return (width + 7) // 8 * height
+    return width * height * len(raw)
+
+
+class FrameBuffer:
+    # Two banks of frames; seq is odd while the renderer flips
+    def __init__(self, path: str):
+        self.path = path
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        if os.fstat(self.fd).st_size < HEADER_SIZE:
+            os.ftruncate(self.fd, HEADER_SIZE)
+        self.mm = None
+        self.header = None
+        # Every memoryview read() has handed out over the current map
+        self.views: list[memoryview] = []
+        self._map()
+        if self.header.magic != MAGIC:
+            ctypes.memset(ctypes.addressof(self.header), 0, ctypes.sizeof(Header))
+            self.header.magic = MAGIC
+
+    def _map(self) -> None:
+        self.header = None
+        if self.mm is not None:
+            # A frame still alive from an earlier read keeps the old map, which
+            # is unmapped once that frame is dropped
+            if self._release_views():
+                self.mm.close()
+            self.views = []
+        self.mm = mmap.mmap(self.fd, os.fstat(self.fd).st_size)
+        self.header = Header.from_buffer(self.mm)
+
+    def _release_views(self) -> bool:
+        # False if a frame handed out earlier is still alive
+        alive = []
+        for view in self.views:
+            try:
+                view.release()
+            except BufferError:
+                alive.append(view)
+        self.views = alive
+        return not alive
+
+    def _grow(self, size: int) -> None:
+        if size > len(self.mm):
+            os.ftruncate(self.fd, size)
+        if os.fstat(self.fd).st_size != len(self.mm):
+            self._map()
+
+    @property
+    def seq(self) -> int:
+        return self.header.seq
+
+    def request_size(self, width: int, height: int) -> None:
+        self.header.want_width = width
+        self.header.want_height = height
+
+    def requested_size(self) -> tuple[int, int]:
+        return self.header.want_width, self.header.want_height
+
+    def request_refresh(self) -> None:
+        self.header.refresh_requests += 1
+
+    def refresh_requests(self) -> int:
+        return self.header.refresh_requests
+
+    def set_status(self, fetched_at: datetime | None, failures: int) -> None:
+        self.header.fetched_at = fetched_at.timestamp() if fetched_at else 0.0
+        self.header.failures = failures
+
+    def status(self) -> tuple[datetime | None, int]:
+        stamp = self.header.fetched_at
+        return (datetime.fromtimestamp(stamp) if stamp else None), self.header.failures
+
+    def write(self, frames: list[PILImage]) -> None:
+        mode = frames[0].mode
+        width, height = frames[0].size
+        raw = LAYOUTS[mode]
+        pixels = frame_bytes(mode, width, height)
+        slot = pixels + PALETTE_SIZE
+        bank_size = max(self.header.bank_size, slot * len(frames))
+        self._grow(HEADER_SIZE + 2 * bank_size)
+
+        header = self.header
+        bank = 1 - header.bank if header.seq > 1 else 0
+        # Odd while writing; a renderer that died mid-write left it odd already
+        header.seq |= 1
+        base = HEADER_SIZE + bank * bank_size
+        for i, frame in enumerate(frames):
+            offset = base + i * slot
+            self.mm[offset : offset + pixels] = frame.tobytes("raw", raw)
+            palette = bytes(frame.getpalette() or b"") if mode == "P" else b""
+            palette = palette.ljust(PALETTE_SIZE, b"\0")
+            self.mm[offset + pixels : offset + slot] = palette
+
+        header.bank_size = bank_size
+        header.bank = bank
+        header.width = width
+        header.height = height
+        header.mode = MODES.index(mode)
+        header.views = len(frames)
+        header.seq += 1
+
+    def read(self) -> tuple[int, list[PILImage]]:
+        # Previous frames first: a map they point into can't be unmapped
+        self._release_views()
+        seq = self.header.seq
+        if not seq or seq & 1:
+            return seq, []
+        # The writer grows the file before it flips, so this maps seq's frames
+        self._grow(0)
+        header = self.header
+        mode_index, views = header.mode, header.views
+        size = (header.width, header.height)
+        base = HEADER_SIZE + header.bank * header.bank_size
+        if header.seq != seq:
+            # A write started while the layout was read
+            return header.seq, []
+        mode = MODES[mode_index]
+        raw = LAYOUTS[mode]
+        pixels = frame_bytes(mode, *size)
+        slot = pixels + PALETTE_SIZE
+        view = memoryview(self.mm)
+        self.views.append(view)
+
+        frames = []
+        for i in range(views):
+            offset = base + i * slot
+            pixel_view = view[offset : offset + pixels]
+            self.views.append(pixel_view)
+            frame = Image.frombuffer(raw, size, pixel_view, "raw", raw, 0, 1)
+            if mode == "P":
+                frame.putpalette(bytes(view[offset + pixels : offset + slot]))
+            frames.append(frame)
+        return seq, frames
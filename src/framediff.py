@@ -0,0 +1,81 @@
+from PIL import ImageChops
+from PIL.Image import Image as PILImage
+
+TILE_SIZE = 32
+
+# (x0, y0, x1, y1), with x1/y1 exclusive like PIL crop boxes
+Rect = tuple[int, int, int, int]
+
+
+def _change_mask(previous: PILImage, current: PILImage) -> PILImage:
+    diff = ImageChops.difference(previous, current)
+    bands = diff.split()
+    mask = bands[0]
+    for band in bands[1:]:
+        mask = ImageChops.lighter(mask, band)
+    return mask
+
+
+def _merge_rows(rows: list[list[Rect]]) -> list[Rect]:
+    merged: list[Rect] = []
+    open_rects: dict[tuple[int, int], int] = {}
+    for row in rows:
+        next_open = {}
+        for x0, y0, x1, y1 in row:
+            idx = open_rects.get((x0, x1))
+            if idx is not None and merged[idx][3] == y0:
+                merged[idx] = (x0, merged[idx][1], x1, y1)
+            else:
+                idx = len(merged)
+                merged.append((x0, y0, x1, y1))
+            next_open[(x0, x1)] = idx
+        open_rects = next_open
+    return merged
+
+
+def diff_frames(
+    previous: PILImage | None, current: PILImage, tile_size: int = TILE_SIZE
+) -> list[Rect]:
+    # A missing previous frame or a size, mode or palette change is all dirty;
+    # P frames add palette entries in draw order, so equal indices can differ
+    width, height = current.size
+    if (
+        previous is None
+        or previous.size != current.size
+        or previous.mode != current.mode
+        or previous.getpalette() != current.getpalette()
+    ):
+        return [(0, 0, width, height)]
+
+    mask = _change_mask(previous, current)
+    bbox = mask.getbbox()
+    if bbox is None:
+        return []
+
+    first_col, first_row = bbox[0] // tile_size, bbox[1] // tile_size
+    last_col, last_row = (bbox[2] - 1) // tile_size, (bbox[3] - 1) // tile_size
+
+    rows = []
+    for row in range(first_row, last_row + 1):
+        y0 = row * tile_size
+        y1 = min(y0 + tile_size, height)
+        runs = []
+        run_start = None
+        for col in range(first_col, last_col + 2):
+            x0 = col * tile_size
+            dirty = col <= last_col and (
+                mask.crop((x0, y0, min(x0 + tile_size, width), y1)).getbbox()
+                is not None
+            )
+            if dirty and run_start is None:
+                run_start = x0
+            elif not dirty and run_start is not None:
+                runs.append((run_start, y0, min(x0, width), y1))
+                run_start = None
+        rows.append(runs)
+
+    return _merge_rows(rows)
+
+
+def dirty_area(rects: list[Rect]) -> int:
+    return sum((x1 - x0) * (y1 - y0) for x0, y0, x1, y1 in rects)
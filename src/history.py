@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import TYPE_CHECKING, TypedDict
+from aggregates import METERS_PER_MILE
+from cache import load_pickle, save_pickle
+
+if TYPE_CHECKING:
+    from stravalib.model import SummaryActivity
+
+ROLLUPS_FILE = "rollups.pkl"
+CALENDAR_WEEKS = 52
+
+
+class HistorySummary(TypedDict):
+    years: list[int]
+    monthly_miles: dict[int, list[float]]
+    lifetime_miles: float
+    lifetime_activities: int
+    first_date: date | None
+    # Monday of the first calendar column, then one entry per day from there
+    calendar_start: date
+    daily_miles: list[float]
+
+
+def week_monday(day: date) -> date:
+    return day - timedelta(days=day.weekday())
+
+
+class HistoryRollups:
+    # Multi-year views read these small tables, never the history
+    def __init__(self):
+        # id -> (local start day, miles), kept so edits and deletes can be undone
+        self.activities: dict[int, tuple[date, float]] = {}
+        self.daily: dict[date, float] = defaultdict(float)
+        # Keyed by the Monday that starts the week
+        self.weekly: dict[date, float] = defaultdict(float)
+        self.weekly_counts: dict[date, int] = defaultdict(int)
+        self.monthly: dict[tuple[int, int], float] = defaultdict(float)
+        self.lifetime_miles = 0.0
+        self.reconciled_at: datetime | None = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for key in ("daily", "weekly", "weekly_counts", "monthly"):
+            state[key] = dict(state[key])
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.daily = defaultdict(float, self.daily)
+        self.weekly = defaultdict(float, self.weekly)
+        self.weekly_counts = defaultdict(int, self.weekly_counts)
+        self.monthly = defaultdict(float, self.monthly)
+
+    def _fold(self, day: date, miles: float, sign: int) -> None:
+        miles *= sign
+        week = week_monday(day)
+        month = (day.year, day.month)
+        self.daily[day] += miles
+        self.weekly[week] += miles
+        self.weekly_counts[week] += sign
+        self.monthly[month] += miles
+        self.lifetime_miles += miles
+        if sign < 0:
+            if self.weekly_counts[week] <= 0:
+                del self.weekly_counts[week]
+                del self.weekly[week]
+            if abs(self.daily[day]) < 1e-9:
+                del self.daily[day]
+            if abs(self.monthly[month]) < 1e-9:
+                del self.monthly[month]
+
+    def apply(self, activity: SummaryActivity) -> None:
+        day = activity.start_date_local.date()
+        miles = (activity.distance or 0) / METERS_PER_MILE
+        existing = self.activities.get(activity.id)
+        if existing == (day, miles):
+            return
+        if existing is not None:
+            self.remove(activity.id)
+        self.activities[activity.id] = (day, miles)
+        self._fold(day, miles, 1)
+
+    def update(self, activity: SummaryActivity) -> None:
+        self.apply(activity)
+
+    def remove(self, activity_id: int) -> None:
+        existing = self.activities.pop(activity_id, None)
+        if existing is not None:
+            self._fold(*existing, -1)
+
+    def reconcile(
+        self, activities: list[SummaryActivity], since: date | None = None
+    ) -> None:
+        seen = set()
+        for activity in activities:
+            seen.add(activity.id)
+            self.apply(activity)
+        for activity_id, (day, _) in list(self.activities.items()):
+            if activity_id not in seen and (since is None or day >= since):
+                self.remove(activity_id)
+
+    def active_weeks(self) -> set[date]:
+        return set(self.weekly_counts)
+
+    def monthly_series(self, year: int) -> list[float]:
+        return [
+            round(max(0.0, self.monthly.get((year, month), 0.0)), 2)
+            for month in range(1, 13)
+        ]
+
+    def calendar(
+        self, today: date, weeks: int = CALENDAR_WEEKS
+    ) -> tuple[date, list[float]]:
+        # Indexed by days since the returned Monday, ending at today
+        start = week_monday(today) - timedelta(weeks=weeks - 1)
+        daily = self.daily
+        return start, [
+            max(0.0, daily.get(start + timedelta(days=i), 0.0))
+            for i in range((today - start).days + 1)
+        ]
+
+    def summary(self, max_years: int, today: date) -> HistorySummary:
+        years = sorted({year for year, _ in self.monthly})[-max_years:]
+        calendar_start, daily_miles = self.calendar(today)
+        return {
+            "years": years,
+            "monthly_miles": {year: self.monthly_series(year) for year in years},
+            "lifetime_miles": round(max(0.0, self.lifetime_miles), 2),
+            "lifetime_activities": len(self.activities),
+            "first_date": min(self.daily) if self.daily else None,
+            "calendar_start": calendar_start,
+            "daily_miles": daily_miles,
+        }
+
+    def save(self) -> None:
+        save_pickle(ROLLUPS_FILE, self)
+
+
+def load_rollups() -> HistoryRollups:
+    rollups = load_pickle(ROLLUPS_FILE)
+    if not isinstance(rollups, HistoryRollups):
+        return HistoryRollups()
+    return rollups
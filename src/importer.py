@@ -0,0 +1,200 @@
+"""Seed the local caches from a Strava "Download your data" archive.
+
+    python3 src/importer.py export_12345.zip [--gpx]
+
+activities.csv is streamed straight out of the zip, one row at a time, and
+folded into the yearly aggregates and history rollups the dashboard keeps in
+cache/. Both are marked as just reconciled, so the next refresh only asks the
+API for activities newer than the export. Stop the dashboard while importing;
+a running one would overwrite the caches with its own copy.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import gzip
+import io
+import math
+import sys
+import zipfile
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Iterator
+from xml.etree.ElementTree import iterparse
+from aggregates import load_aggregates
+from history import load_rollups
+
+if TYPE_CHECKING:
+    from stravalib.model import SummaryActivity
+
+ACTIVITIES_CSV = "activities.csv"
+# Columns every row needs; the rest are optional and default to empty
+REQUIRED_COLUMNS = ("Activity ID", "Activity Date")
+# activities.csv writes dates like "Jan 5, 2024, 1:23:45 PM", in UTC
+EXPORT_DATE_FORMATS = ("%b %d, %Y, %I:%M:%S %p", "%Y-%m-%d %H:%M:%S")
+EARTH_RADIUS_M = 6371008.8
+
+
+def parse_export_date(value: str) -> datetime:
+    for fmt in EXPORT_DATE_FORMATS:
+        try:
+            return datetime.strptime(value.strip(), fmt).replace(tzinfo=timezone.utc)
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognized activity date: {value!r}")
+
+
+def _number(value: str | None) -> float | None:
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+def _haversine(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = (
+        math.sin(dphi / 2) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+
+def gpx_track_stats(stream) -> tuple[float, int]:
+    # Points are cleared as they are read, so memory stays flat
+    meters = 0.0
+    previous = None
+    first_time = last_time = None
+    for _, elem in iterparse(stream, events=("end",)):
+        tag = elem.tag.rsplit("}", 1)[-1]
+        if tag == "time" and elem.text:
+            stamp = datetime.fromisoformat(elem.text.strip().replace("Z", "+00:00"))
+            first_time = first_time or stamp
+            last_time = stamp
+        elif tag == "trkpt":
+            point = (float(elem.get("lat")), float(elem.get("lon")))
+            if previous is not None:
+                meters += _haversine(*previous, *point)
+            previous = point
+            elem.clear()
+    elapsed = int((last_time - first_time).total_seconds()) if first_time else 0
+    return meters, elapsed
+
+
+def _open_member(archive: zipfile.ZipFile, name: str):
+    stream = archive.open(name)
+    if name.endswith(".gz"):
+        return gzip.GzipFile(fileobj=stream)
+    return stream
+
+
+def read_activities(
+    archive: zipfile.ZipFile, use_gpx: bool = False
+) -> Iterator[SummaryActivity]:
+    # Later duplicate headers win: the second Distance is in meters
+    from stravalib.model import SummaryActivity
+
+    with archive.open(ACTIVITIES_CSV) as raw:
+        rows = csv.reader(io.TextIOWrapper(raw, encoding="utf-8", newline=""))
+        header = next(rows, [])
+        for name in REQUIRED_COLUMNS:
+            if name not in header:
+                raise ValueError(f"{ACTIVITIES_CSV} has no {name!r} column")
+        columns = {name: i for i, name in enumerate(header)}
+        distance_in_km = header.count("Distance") < 2
+
+        for row in rows:
+            if not row:
+                continue
+
+            def get(name: str) -> str | None:
+                i = columns.get(name)
+                return row[i] if i is not None and i < len(row) else None
+
+            if not all(get(name) for name in REQUIRED_COLUMNS):
+                raise ValueError(
+                    f"{ACTIVITIES_CSV} line {rows.line_num} has no "
+                    f"{' or '.join(REQUIRED_COLUMNS)}"
+                )
+            start = parse_export_date(get("Activity Date"))
+            # The export has no timezone per activity; assume the frame's own
+            start_local = start.astimezone().replace(tzinfo=timezone.utc)
+            distance = _number(get("Distance")) or 0.0
+            if distance_in_km:
+                distance *= 1000
+            elapsed = int(_number(get("Elapsed Time")) or 0)
+            moving = int(_number(get("Moving Time")) or elapsed)
+
+            filename = get("Filename") or ""
+            if use_gpx and (not distance or not moving) and ".gpx" in filename:
+                try:
+                    with _open_member(archive, filename) as stream:
+                        track_meters, track_seconds = gpx_track_stats(stream)
+                except (KeyError, OSError, SyntaxError, ValueError) as e:
+                    print(f"Skipping {filename}: {e}", file=sys.stderr)
+                else:
+                    distance = distance or track_meters
+                    moving = moving or track_seconds
+                    elapsed = elapsed or track_seconds
+
+            yield SummaryActivity.model_validate(
+                {
+                    "id": int(get("Activity ID")),
+                    "name": get("Activity Name") or "",
+                    "start_date": start,
+                    "start_date_local": start_local,
+                    "distance": distance,
+                    "moving_time": moving,
+                    "elapsed_time": elapsed,
+                    "max_speed": _number(get("Max Speed")),
+                    "average_cadence": _number(get("Average Cadence")),
+                    "average_heartrate": _number(get("Average Heart Rate")),
+                }
+            )
+
+
+def import_archive(path: str, use_gpx: bool = False) -> tuple[int, int]:
+    now = datetime.now()
+    aggregates = load_aggregates(now.year)
+    rollups = load_rollups()
+    total = this_year = 0
+
+    with zipfile.ZipFile(path) as archive:
+        for activity in read_activities(archive, use_gpx):
+            rollups.apply(activity)
+            if activity.start_date_local.year == now.year:
+                aggregates.apply(activity)
+                this_year += 1
+            total += 1
+
+    aggregates.reconciled_at = now
+    rollups.reconciled_at = now
+    aggregates.save()
+    rollups.save()
+    return total, this_year
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Seed the dashboard's caches from a Strava bulk export."
+    )
+    parser.add_argument("archive", help="the export_<id>.zip from Strava")
+    parser.add_argument(
+        "--gpx",
+        action="store_true",
+        help="fill in missing distance/time from each activity's GPX track",
+    )
+    args = parser.parse_args()
+
+    try:
+        total, this_year = import_archive(args.archive, args.gpx)
+    except (OSError, zipfile.BadZipFile, KeyError, ValueError) as e:
+        print(f"Import failed: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"Imported {total} activities ({this_year} this year)")
+
+
+if __name__ == "__main__":
+    main()
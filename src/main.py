@@ -1,45 +1,132 @@
+from startup import STARTED_AT
 import tkinter as tk
+import time
 import traceback
+import os
 import sys
-from pathlib import Path
+import queue
+import threading
+import config
 from config import (
-    REFRESH_TIME,
-    SLEEP_MODE_ENABLED,
-    SLEEP_MODE_START,
-    SLEEP_MODE_END,
-    ACCENT_COLOR,
     HEIGHT,
     WIDTH,
-    DARK_MODE,
-    FULL_SCREEN,
+    MEMORY_PROFILE,
+    MEMORY_BUDGET_MB,
+    SPLIT_PROCESSES,
 )
+from data import DashboardData, import_api_modules, refresh_activities
 from render import (
-    generate_image,
+    RENDER_SETTINGS,
+    render_dashboard,
     generate_sleep_image,
     Renderer,
     DARK_TEXT_COLOR,
     LIGHT_TEXT_COLOR,
 )
+from framediff import Rect, diff_frames, dirty_area
+from cache import load_snapshot, save_snapshot
+from crashlog import RESTART_ENV, record_crash
+from memory import MB, MemoryProfiler, release_memory, rss_bytes
+from framebuffer import FrameBuffer
+from processes import (
+    WORKERS,
+    frame_buffer_path,
+    is_sleep_mode,
+    retry_delay_ms,
+    start_worker,
+)
 from datetime import datetime
 from PIL import ImageTk
 
+# Above this fraction of changed pixels a full paste beats per-region copies
+FULL_PASTE_THRESHOLD = 0.5
+RESIZE_DEBOUNCE_MS = 250
+MAX_CACHED_RESOLUTIONS = 4
+FETCH_POLL_MS = 200
+CONFIG_POLL_MS = 2000
+WORKER_RESTART_MS = 30 * 1000
+FIRST_PIXEL_BUDGET_SECONDS = 1.0
+
 tk_root = None
 tk_label = None
-tk_photo = None
+tk_photos = []
+sleep_photo = None
 exit_btn = None
 refresh_btn = None
 fullscreen_btn = None
 advanced_btn = None
 loading_label = None
+stale_label = None
 current_width = WIDTH
 current_height = HEIGHT
-show_advanced = False
+# 0 = main, 1 = trends, 2 = year over year, 3 = personal records
+view_index = 0
 imgs = None
-
-
-def is_sleep_mode() -> bool:
-    hour = datetime.now().hour
-    return SLEEP_MODE_ENABLED and (hour >= SLEEP_MODE_START or hour < SLEEP_MODE_END)
+dirty_rects: list[list[Rect]] = []
+dashboard_data: DashboardData | None = None
+render_cache: dict[tuple[int, int], tuple] = {}
+fetched_at: datetime | None = None
+fetch_failures = 0
+force_next_fetch = False
+fetch_results: queue.Queue = queue.Queue()
+resize_after_id = None
+rotate_after_id = None
+scheduler = None
+config_watcher: config.ConfigWatcher | None = None
+# Bumped by every reload that changes how frames look; a fetch that started
+# before one rendered with the old settings
+config_generation = 0
+profiler = MemoryProfiler(MEMORY_PROFILE)
+# In budget mode the frames that just went off screen are rendered into next
+spare_frames: tuple | None = None
+# Split mode: frames come from the renderer process through this buffer
+frame_buffer: FrameBuffer | None = None
+workers: dict = {}
+shown_state = None
+
+
+class RefreshScheduler:
+    # The callback may finish asynchronously; it calls finish()
+    def __init__(self, root: tk.Tk, interval: int, callback):
+        self.root = root
+        self.interval = interval
+        self.callback = callback
+        self._after_id = None
+        self._in_flight = False
+        self._rerun = False
+
+    def request(self, delay: int = 0) -> None:
+        if self._in_flight:
+            self._rerun = True
+            return
+        self._schedule(delay)
+
+    def cancel(self) -> None:
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+
+    def _schedule(self, delay: int) -> None:
+        self.cancel()
+        self._after_id = self.root.after(delay, self._run)
+
+    def _run(self) -> None:
+        self._after_id = None
+        self._in_flight = True
+        self.callback()
+
+    def set_interval(self, interval: int) -> None:
+        self.interval = interval
+        if self._after_id is not None:
+            self._schedule(interval)
+
+    def finish(self, delay: int | None = None) -> None:
+        self._in_flight = False
+        if self._rerun:
+            self._rerun = False
+            self._schedule(0)
+        else:
+            self._schedule(self.interval if delay is None else delay)
 
 
 def show_loading() -> None:
@@ -60,28 +147,81 @@ def read_window_dimensions() -> tuple[int, int]:
 def toggle_fullscreen(event=None) -> None:
     is_fullscreen = not tk_root.attributes("-fullscreen")
     tk_root.attributes("-fullscreen", is_fullscreen)
-    show_loading()
-    tk_root.after(1000, on_resize_settled)
+
+
+def show_next_view() -> None:
+    global view_index
+    if not tk_photos or is_sleep_mode():
+        return
+    view_index = (view_index + 1) % len(tk_photos)
+    tk_label.config(image=tk_photos[view_index])
+
 
 def toggle_advanced_view() -> None:
-    global imgs, tk_photo, show_advanced
-    show_advanced = not show_advanced 
-    img = imgs[0]
-    if show_advanced:
-        img = imgs[1]
+    show_next_view()
+    schedule_rotation()
+
+
+def schedule_rotation() -> None:
+    global rotate_after_id
+    if rotate_after_id is not None:
+        tk_root.after_cancel(rotate_after_id)
+        rotate_after_id = None
+    if config.ROTATE_SECONDS:
+        rotate_after_id = tk_root.after(config.ROTATE_SECONDS * 1000, rotate_view)
+
+
+def rotate_view() -> None:
+    global rotate_after_id
+    rotate_after_id = None
+    show_next_view()
+    schedule_rotation()
+
+
+def update_photo(
+    photo: ImageTk.PhotoImage | None, img, rects: list[Rect] | None = None
+) -> ImageTk.PhotoImage:
+    if photo is None or (photo.width(), photo.height()) != img.size:
+        return ImageTk.PhotoImage(img)
+
+    if rects is None or dirty_area(rects) > FULL_PASTE_THRESHOLD * img.width * img.height:
+        photo.paste(img)
+        return photo
+
+    for x0, y0, x1, y1 in rects:
+        patch = ImageTk.PhotoImage(img.crop((x0, y0, x1, y1)))
+        tk_root.tk.call(str(photo), "copy", str(patch), "-to", x0, y0)
+    return photo
+
+
+def on_configure(event) -> None:
+    global resize_after_id
+    if event.widget is not tk_root:
+        return
+    if (event.width, event.height) == (current_width, current_height):
+        return
+    if resize_after_id is not None:
+        tk_root.after_cancel(resize_after_id)
+    resize_after_id = tk_root.after(RESIZE_DEBOUNCE_MS, on_resize_settled)
 
-    tk_photo = ImageTk.PhotoImage(img)
-    tk_label.config(image=tk_photo)
 
 def on_resize_settled() -> None:
-    global current_width, current_height
+    global current_width, current_height, resize_after_id
+    resize_after_id = None
     current_width, current_height = read_window_dimensions()
-    tk_root.after(1000, update_dashboard)
+    if frame_buffer is not None:
+        frame_buffer.request_size(current_width, current_height)
+    redraw_dashboard()
 
 
 def refresh_dashboard() -> None:
+    global force_next_fetch
     show_loading()
-    tk_root.after(1000, update_dashboard)
+    if frame_buffer is not None:
+        frame_buffer.request_refresh()
+        return
+    force_next_fetch = True
+    scheduler.request()
 
 
 def update_button_position() -> None:
@@ -104,7 +244,7 @@ def update_button_position() -> None:
         advanced_btn.place_forget()
         return
 
-    exit_btn.config(font=("Arial", font_size), bg=ACCENT_COLOR)
+    exit_btn.config(font=("Arial", font_size), bg=config.ACCENT_COLOR)
     refresh_btn.config(font=("Arial", font_size))
     fullscreen_btn.config(font=("Arial", font_size))
     advanced_btn.config(font=("Arial", font_size))
@@ -128,23 +268,241 @@ def update_button_position() -> None:
         height=button_size,
     )
 
+def render_frames(width: int, height: int) -> tuple:
+    global spare_frames
+
+    key = (width, height)
+    if key not in render_cache:
+        limit = 1 if MEMORY_BUDGET_MB else MAX_CACHED_RESOLUTIONS
+        while len(render_cache) >= limit:
+            del render_cache[next(iter(render_cache))]
+        buffers, spare_frames = spare_frames, None
+        with profiler.stage("render"):
+            render_cache[key] = render_dashboard(
+                width, height, dashboard_data, buffers
+            )
+    return render_cache[key]
+
+
+def fetch_worker(
+    force: bool, size: tuple[int, int], buffers: tuple | None, generation: int
+) -> None:
+    try:
+        import_api_modules()
+        with profiler.stage("fetch"):
+            data = refresh_activities(force)
+        if MEMORY_BUDGET_MB:
+            release_memory()
+        with profiler.stage("render"):
+            frames = render_dashboard(*size, data, buffers)
+        fetch_results.put(((data, size, frames, generation), None))
+    except Exception as e:
+        fetch_results.put((None, e))
+
+
 def update_dashboard() -> None:
-    global show_advanced, tk_photo, imgs
+    global force_next_fetch, spare_frames
+
+    if is_sleep_mode():
+        redraw_dashboard()
+        scheduler.finish()
+        return
+
+    force, force_next_fetch = force_next_fetch, False
+    buffers, spare_frames = spare_frames, None
+    threading.Thread(
+        target=fetch_worker,
+        args=(force, (current_width, current_height), buffers, config_generation),
+        daemon=True,
+    ).start()
+    tk_root.after(FETCH_POLL_MS, poll_fetch)
+
+
+def poll_fetch() -> None:
+    try:
+        data, error = fetch_results.get_nowait()
+    except queue.Empty:
+        tk_root.after(FETCH_POLL_MS, poll_fetch)
+        return
+
+    if error is None:
+        on_fetch_success(data)
+    else:
+        on_fetch_failure(error)
+
+
+def on_fetch_success(
+    result: tuple[DashboardData, tuple[int, int], tuple, int]
+) -> None:
+    global dashboard_data, fetched_at, fetch_failures
+
+    data, size, frames, generation = result
+    dashboard_data = data
+    fetched_at = datetime.now()
+    fetch_failures = 0
+    render_cache.clear()
+    if generation == config_generation:
+        render_cache[size] = frames
+    else:
+        # config.toml changed how frames look while this fetch was rendering
+        frames = render_frames(*size)
+    redraw_dashboard()
+    threading.Thread(
+        target=save_snapshot, args=(data, fetched_at, list(frames)), daemon=True
+    ).start()
+    check_memory_budget()
+    scheduler.finish()
+
+
+def check_memory_budget() -> None:
+    if not MEMORY_BUDGET_MB:
+        return
+    rss = rss_bytes()
+    if rss > MEMORY_BUDGET_MB * MB:
+        print(
+            f"Memory use {rss / MB:.0f} MB is over the {MEMORY_BUDGET_MB} MB budget",
+            file=sys.stderr,
+        )
+
+
+def on_fetch_failure(error: Exception) -> None:
+    global fetch_failures
+
+    fetch_failures += 1
+    delay = retry_delay_ms(fetch_failures)
+    print(
+        f"Refresh failed ({type(error).__name__}: {error}); "
+        f"retrying in {delay // 1000}s",
+        file=sys.stderr,
+    )
+    redraw_dashboard()
+    scheduler.finish(delay)
+
+
+def poll_frame_buffer() -> None:
+    global imgs, fetched_at, fetch_failures, shown_state
+
+    for name, process in list(workers.items()):
+        if process is not None and not process.is_alive():
+            print(
+                f"{name} process exited with code {process.exitcode}; "
+                f"restarting in {WORKER_RESTART_MS // 1000}s",
+                file=sys.stderr,
+            )
+            workers[name] = None
+            tk_root.after(WORKER_RESTART_MS, restart_worker, name)
+
+    fetched_at, fetch_failures = frame_buffer.status()
+    seq = frame_buffer.seq
+    state = (seq, fetched_at, fetch_failures, is_sleep_mode())
+    if state != shown_state and not seq & 1:
+        # Nothing may point into the buffer while it is read; it may remap
+        imgs = None
+        imgs = tuple(frame_buffer.read()[1]) or None
+        redraw_dashboard()
+        # A write that started during the blit may have torn it; show it again
+        shown_state = state if frame_buffer.seq == seq else None
+    tk_root.after(FETCH_POLL_MS, poll_frame_buffer)
+
+
+def restart_worker(name: str) -> None:
+    workers[name] = start_worker(name, frame_buffer.path)
+
+
+def update_stale_indicator() -> None:
+    if fetch_failures == 0 or fetched_at is None or is_sleep_mode():
+        stale_label.place_forget()
+        return
+
+    header = Renderer(current_width, current_height).header_height
+    stale_label.config(
+        text=f"Offline · updated {fetched_at.strftime('%b %-d %H:%M')}",
+        font=("Arial", max(8, int(header * 0.15))),
+    )
+    stale_label.place(x=int(header * 0.1), y=int(header * 0.1))
+
+
+def update_photos() -> None:
+    global tk_photos
+
+    if len(tk_photos) != len(imgs):
+        tk_photos = [None] * len(imgs)
+    with profiler.stage("display"):
+        tk_photos = [
+            update_photo(p, img, rects)
+            for p, img, rects in zip(tk_photos, imgs, dirty_rects)
+        ]
+
+
+def redraw_dashboard() -> None:
+    global sleep_photo, imgs, dirty_rects, spare_frames
 
     if is_sleep_mode():
-        img = generate_sleep_image(current_width, current_height)
+        sleep_photo = update_photo(
+            sleep_photo, generate_sleep_image(current_width, current_height)
+        )
+        photo = sleep_photo
+    elif frame_buffer is not None:
+        if not imgs:
+            return
+        # The renderer rewrites the other bank under any diff; paste whole frames
+        dirty_rects = [None] * len(imgs)
+        update_photos()
+        photo = tk_photos[view_index % len(tk_photos)]
+    elif dashboard_data is None:
+        return
     else:
-        imgs = generate_image(current_width, current_height)
-        img = imgs[0]
-        if show_advanced:
-            img = imgs[1]
+        previous = imgs
+        imgs = render_frames(current_width, current_height)
+        if not previous or len(previous) != len(imgs):
+            previous = [None] * len(imgs)
+        dirty_rects = [diff_frames(old, new) for old, new in zip(previous, imgs)]
+        update_photos()
+        if (
+            MEMORY_BUDGET_MB
+            and previous is not imgs
+            and previous[0] is not None
+            and previous[0].size == imgs[0].size
+        ):
+            spare_frames = tuple(previous)
+        photo = tk_photos[view_index % len(tk_photos)]
 
     update_button_position()
-    tk_photo = ImageTk.PhotoImage(img)
-    tk_label.config(image=tk_photo)
+    update_stale_indicator()
+    tk_label.config(image=photo)
     if loading_label and loading_label.winfo_ismapped():
         loading_label.place_forget()
-    tk_root.after(REFRESH_TIME, update_dashboard)
+
+
+def check_config() -> None:
+    if config_watcher.changed():
+        changed = config.reload()
+        if changed:
+            apply_config(changed)
+    tk_root.after(CONFIG_POLL_MS, check_config)
+
+
+def apply_config(changed: set[str]) -> None:
+    # Only frames with an old theme or chart are dropped, no data
+    global spare_frames, config_generation
+
+    print(f"Reloaded config.toml: {', '.join(sorted(changed))}", file=sys.stderr)
+    if changed & RENDER_SETTINGS:
+        config_generation += 1
+        render_cache.clear()
+        spare_frames = None
+    if changed & {"ACCENT_COLOR", "DARK_MODE"}:
+        fg = LIGHT_TEXT_COLOR if config.DARK_MODE else DARK_TEXT_COLOR
+        widgets = (exit_btn, refresh_btn, fullscreen_btn, advanced_btn, stale_label)
+        for widget in widgets:
+            widget.config(bg=config.ACCENT_COLOR, fg=fg)
+    if "FULL_SCREEN" in changed:
+        tk_root.attributes("-fullscreen", config.FULL_SCREEN)
+    if "ROTATE_SECONDS" in changed:
+        schedule_rotation()
+    if "REFRESH_TIME" in changed:
+        scheduler.set_interval(config.REFRESH_TIME)
+    redraw_dashboard()
 
 
 def handle_exception(exc_type, exc_value, exc_traceback):
@@ -152,19 +510,41 @@ def handle_exception(exc_type, exc_value, exc_traceback):
         traceback.format_exception(exc_type, exc_value, exc_traceback)
     )
     print(error_message, file=sys.stderr)
+    record_crash(error_message)
+    # Under supervisor.py this is a warm restart, not the end of the frame
+    sys.exit(1)
 
-    logs_dir = Path(__file__).parent.parent / "logs"
-    logs_dir.mkdir(exist_ok=True)
-    log_filename = logs_dir / f"{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.log"
-    with open(log_filename, "w") as f:
-        f.write(error_message)
 
-    sys.exit(1)
+def restore_snapshot() -> int:
+    # A supervised restart keeps a snapshot younger than REFRESH_TIME
+    global dashboard_data, fetched_at
+
+    snapshot = load_snapshot()
+    if snapshot is None:
+        return 0
+
+    dashboard_data = snapshot["data"]
+    fetched_at = snapshot["fetched_at"]
+    if snapshot["frames"]:
+        render_cache[snapshot["size"]] = tuple(snapshot["frames"])
+
+    age_ms = int((datetime.now() - fetched_at).total_seconds() * 1000)
+    if os.environ.get(RESTART_ENV) and 0 <= age_ms < config.REFRESH_TIME:
+        return config.REFRESH_TIME - age_ms
+    return 0
 
 
 def run_dashboard() -> None:
     global tk_root, tk_label, refresh_btn, fullscreen_btn, exit_btn, advanced_btn, loading_label
-    global current_width, current_height
+    global stale_label, current_width, current_height, scheduler, frame_buffer
+    global config_watcher
+
+    if SPLIT_PROCESSES:
+        # Workers start before Tk exists and find the size request on their own
+        frame_buffer = FrameBuffer(frame_buffer_path())
+        frame_buffer.request_size(WIDTH, HEIGHT)
+        for name in WORKERS:
+            workers[name] = start_worker(name, frame_buffer.path)
 
     tk_root = tk.Tk()
     tk_root.report_callback_exception = handle_exception
@@ -172,7 +552,7 @@ def run_dashboard() -> None:
     tk_root.title("")
     tk_root.geometry(f"{WIDTH}x{HEIGHT}")
     tk_root.resizable(False, False)
-    tk_root.attributes("-fullscreen", FULL_SCREEN)
+    tk_root.attributes("-fullscreen", config.FULL_SCREEN)
     tk_root.config(cursor="none")
 
     frame = tk.Frame(tk_root)
@@ -190,10 +570,16 @@ def run_dashboard() -> None:
     )
     loading_label.place(relx=0.5, rely=0.5, anchor="center")
 
+    stale_label = tk.Label(
+        frame,
+        bg=config.ACCENT_COLOR,
+        fg=LIGHT_TEXT_COLOR if config.DARK_MODE else DARK_TEXT_COLOR,
+    )
+
     shared_btn_config = dict(
         font=("Arial", 20),
-        bg=ACCENT_COLOR,
-        fg=LIGHT_TEXT_COLOR if DARK_MODE else DARK_TEXT_COLOR,
+        bg=config.ACCENT_COLOR,
+        fg=LIGHT_TEXT_COLOR if config.DARK_MODE else DARK_TEXT_COLOR,
         borderwidth=0,
         relief="flat",
         padx=0,
@@ -212,8 +598,30 @@ def run_dashboard() -> None:
 
     tk_root.update_idletasks()
     current_width, current_height = read_window_dimensions()
+    tk_root.bind("<Configure>", on_configure)
+
+    scheduler = RefreshScheduler(tk_root, config.REFRESH_TIME, update_dashboard)
+    config_watcher = config.ConfigWatcher()
+    tk_root.after(CONFIG_POLL_MS, check_config)
+    if frame_buffer is not None:
+        frame_buffer.request_size(current_width, current_height)
+        poll_frame_buffer()
+        tk_root.mainloop()
+        return
 
-    update_dashboard()
+    first_refresh = restore_snapshot()
+    redraw_dashboard()
+    tk_root.update_idletasks()
+    if dashboard_data is not None:
+        first_pixel = time.perf_counter() - STARTED_AT
+        if first_pixel > FIRST_PIXEL_BUDGET_SECONDS:
+            print(
+                f"First frame took {first_pixel:.2f}s "
+                f"(budget {FIRST_PIXEL_BUDGET_SECONDS:.1f}s)",
+                file=sys.stderr,
+            )
+    scheduler.request(first_refresh)
+    schedule_rotation()
     tk_root.mainloop()
 
 
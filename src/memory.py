@@ -0,0 +1,77 @@
+import ctypes
+import ctypes.util
+import gc
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+MB = 1024 * 1024
+
+try:
+    _PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+except (AttributeError, ValueError, OSError):
+    _PAGE_SIZE = 4096
+
+try:
+    _libc = ctypes.CDLL(ctypes.util.find_library("c") or None)
+    _malloc_trim = _libc.malloc_trim
+except (OSError, AttributeError):
+    _malloc_trim = None
+
+
+def rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        import resource
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def release_memory() -> None:
+    gc.collect()
+    if _malloc_trim is not None:
+        _malloc_trim(0)
+
+
+class MemoryProfiler:
+    # Each stage is compared with itself on the previous refresh
+    def __init__(self, enabled: bool, top: int = 3):
+        self.enabled = enabled
+        self.top = top
+        self._snapshots: dict[str, tracemalloc.Snapshot] = {}
+        if enabled and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def stage(self, name: str):
+        if not self.enabled:
+            yield
+            return
+
+        rss_before = rss_bytes()
+        tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            rss = rss_bytes()
+            current, peak = tracemalloc.get_traced_memory()
+            print(
+                f"[memory] {name}: {elapsed:.2f}s, rss {rss / MB:.1f} MB "
+                f"({(rss - rss_before) / MB:+.1f}), traced {current / MB:.1f} MB "
+                f"(peak {peak / MB:.1f})",
+                file=sys.stderr,
+            )
+            snapshot = tracemalloc.take_snapshot().filter_traces(
+                [tracemalloc.Filter(False, tracemalloc.__file__)]
+            )
+            previous = self._snapshots.get(name)
+            self._snapshots[name] = snapshot
+            if previous is not None:
+                for stat in snapshot.compare_to(previous, "lineno")[: self.top]:
+                    print(f"[memory]   {stat}", file=sys.stderr)
@@ -0,0 +1,474 @@
+"""Check fetch, aggregation and render times against a Raspberry Pi 2B budget.
+
+    python3 src/perf.py            # measure and compare with perf_baseline.toml
+    python3 src/perf.py --update   # rewrite the budgets from a new measurement
+
+Every case runs in its own process, pinned to one core (as taskset -c would)
+and, where the harness may create a cgroup, capped at cpu_quota of that core
+to bring a desktop CPU down to roughly a 900 MHz Cortex-A7. Without a cgroup
+the quota is emulated by scaling CPU time. Fetches go to a fake Strava server
+on localhost that serves a synthetic history, and each run gets its own
+config.toml and cache directory, so no account, network or local state is
+involved. Exits non-zero when any time or peak RSS is over its budget.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import random
+import re
+import resource
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tomllib
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+BASELINE_PATH = Path(__file__).parent.parent / "perf_baseline.toml"
+RESOLUTIONS = ((320, 240), (800, 480), (1024, 600))
+# A Pi 2B core does roughly a tenth of the work of a current desktop core
+DEFAULT_CPU_QUOTA = 0.1
+# Short periods keep the throttled timings smooth at this scale
+CPU_PERIOD_US = 20000
+CGROUP_NAME = "strava-frame-perf"
+# New budgets leave this much room over the measurement they come from, unless
+# the baseline's [harness] sets its own headroom
+DEFAULT_HEADROOM = 1.5
+# Under a quota, anything shorter than a few periods is mostly scheduling noise
+MIN_BUDGET_SECONDS = 0.01
+RENDER_REPEATS = 9
+# Icons are timed as one batch, each call being far shorter than a CPU period
+ICON_REPEATS = 20
+AGGREGATE_REPEATS = 5
+# Passes per aggregate timing; a single pass spans only a few CPU periods
+AGGREGATE_BATCH = 4
+WARM_FETCH_REPEATS = 5
+# --update keeps the slowest of this many measurements, so a quiet moment on
+# the machine does not set budgets an ordinary run cannot meet
+UPDATE_RUNS = 3
+SYNTHETIC_YEARS = 10
+SYNTHETIC_SEED = 2
+ROUTE_POINTS = 60
+
+PERF_CONFIG = """\
+[strava]
+client_id = "0"
+client_secret = "perf"
+refresh_token = "perf"
+
+[display]
+accent_color = "#FC4C02"
+dark_mode = false
+full_screen = false
+width = 800
+height = 480
+trend_smoothing = 0
+monthly_chart = "bars"
+rotate_seconds = 0
+output_mode = "RGB"
+
+[app]
+refresh_time_minutes = 15
+request_timeout_seconds = 20
+split_processes = false
+
+[sleep_mode]
+enabled = false
+
+[memory]
+profile = false
+budget_mb = 0
+"""
+
+
+def encode_polyline(points: list[tuple[float, float]], precision: int = 5) -> str:
+    factor = 10**precision
+    chunks = []
+    previous = (0, 0)
+    for lat, lng in points:
+        current = (round(lat * factor), round(lng * factor))
+        for value, last in zip(current, previous):
+            delta = value - last
+            delta = ~(delta << 1) if delta < 0 else delta << 1
+            while delta >= 0x20:
+                chunks.append(chr((0x20 | (delta & 0x1F)) + 63))
+                delta >>= 5
+            chunks.append(chr(delta + 63))
+        previous = current
+    return "".join(chunks)
+
+
+def synthetic_history(
+    years: int = SYNTHETIC_YEARS, seed: int = SYNTHETIC_SEED
+) -> list[dict]:
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    day = now - timedelta(days=365 * years)
+    activities = []
+    while day < now:
+        if rng.random() < 0.7:
+            start = day.replace(hour=rng.randint(6, 19), minute=rng.randint(0, 59))
+            meters = rng.uniform(3000, 22000)
+            seconds = int(meters * rng.uniform(0.28, 0.38))
+            lat, lng = 40 + rng.random(), -74 + rng.random()
+            radius = meters / 2 / math.pi / 111000
+            route = [
+                (
+                    lat + radius * math.sin(2 * math.pi * i / ROUTE_POINTS),
+                    lng + radius * math.cos(2 * math.pi * i / ROUTE_POINTS),
+                )
+                for i in range(ROUTE_POINTS + 1)
+            ]
+            activity_id = len(activities) + 1
+            activities.append(
+                {
+                    "id": activity_id,
+                    "name": f"Run {activity_id}",
+                    "type": "Run",
+                    "sport_type": "Run",
+                    "distance": round(meters, 1),
+                    "moving_time": seconds,
+                    "elapsed_time": seconds + rng.randint(0, 300),
+                    "start_date": start.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                    "start_date_local": start.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                    "average_cadence": round(rng.uniform(78, 90), 1),
+                    "average_heartrate": round(rng.uniform(130, 170), 1),
+                    "max_speed": round(meters / seconds * 1.4, 2),
+                    "pr_count": rng.choice((0, 0, 0, 1)),
+                    "map": {
+                        "id": f"a{activity_id}",
+                        "summary_polyline": encode_polyline(route),
+                    },
+                }
+            )
+        day += timedelta(days=1)
+    return activities
+
+
+class FakeStrava(BaseHTTPRequestHandler):
+    activities: list[dict] = []
+    protocol_version = "HTTP/1.1"
+
+    def _send(self, payload) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self) -> None:
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self._send(
+            {
+                "token_type": "Bearer",
+                "access_token": "perf",
+                "refresh_token": "perf",
+                "expires_at": int(time.time()) + 6 * 3600,
+                "expires_in": 6 * 3600,
+            }
+        )
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        detail = re.fullmatch(r"/api/v3/activities/(\d+)", url.path)
+        if detail:
+            activity = self.activities[int(detail.group(1)) - 1]
+            self._send({**activity, "best_efforts": []})
+            return
+
+        page = int(query.get("page", 1))
+        per_page = int(query.get("per_page", 30))
+        if "after" in query:
+            # Strava lists oldest first when asked for activities after a time
+            after = datetime.fromtimestamp(int(query["after"]), timezone.utc)
+            stamp = after.strftime("%Y-%m-%dT%H:%M:%SZ")
+            listing = [a for a in self.activities if a["start_date"] > stamp]
+        else:
+            listing = self.activities[::-1]
+        self._send(listing[(page - 1) * per_page : page * per_page])
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+
+def start_fake_strava(activities: list[dict]) -> ThreadingHTTPServer:
+    FakeStrava.activities = activities
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeStrava)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def make_cpu_cgroup(quota: float) -> Path | None:
+    root = Path("/sys/fs/cgroup")
+    try:
+        if (root / "cgroup.controllers").exists():
+            group = root / CGROUP_NAME
+            group.mkdir(exist_ok=True)
+            limit = f"{int(quota * CPU_PERIOD_US)} {CPU_PERIOD_US}"
+            (group / "cpu.max").write_text(limit)
+        elif (root / "cpu").is_dir():
+            group = root / "cpu" / CGROUP_NAME
+            group.mkdir(exist_ok=True)
+            (group / "cpu.cfs_period_us").write_text(str(CPU_PERIOD_US))
+            (group / "cpu.cfs_quota_us").write_text(str(int(quota * CPU_PERIOD_US)))
+        else:
+            return None
+    except OSError:
+        return None
+    return group / "cgroup.procs"
+
+
+def _pin_and_throttle(procs: Path | None, quota: float):
+    # Returns a clock in emulated Pi seconds
+    os.sched_setaffinity(0, {min(os.sched_getaffinity(0))})
+    if procs is not None:
+        procs.write_text(str(os.getpid()))
+        return time.perf_counter
+    return lambda: time.process_time() / quota
+
+
+def _fake_strava_session(port: int) -> None:
+    from data import MAX_CONCURRENT_REQUESTS
+    from config import REQUEST_TIMEOUT
+    from session import STRAVA_HOST, TimeoutHTTPAdapter, get_session
+
+    class FakeStravaAdapter(TimeoutHTTPAdapter):
+        def send(self, request, **kwargs):
+            request.url = request.url.replace(
+                STRAVA_HOST, f"http://127.0.0.1:{port}", 1
+            )
+            return super().send(request, **kwargs)
+
+    get_session(REQUEST_TIMEOUT, MAX_CONCURRENT_REQUESTS).mount(
+        STRAVA_HOST, FakeStravaAdapter(REQUEST_TIMEOUT)
+    )
+
+
+def _case_fetch(clock, port: int, size) -> dict:
+    import data
+
+    _fake_strava_session(port)
+    data.import_api_modules()
+    start = clock()
+    data.refresh_activities()
+    cold = clock() - start
+    timings = []
+    for _ in range(WARM_FETCH_REPEATS):
+        start = clock()
+        data.refresh_activities()
+        timings.append(clock() - start)
+    return {"cold_seconds": cold, "warm_seconds": statistics.median(timings)}
+
+
+def _summaries(activities: list[dict]) -> list:
+    from stravalib.model import SummaryActivity
+
+    return [SummaryActivity.model_validate(a) for a in activities]
+
+
+def _case_aggregate(clock, port: int, size) -> dict:
+    from data import parse_yearly_data
+
+    activities = _summaries(synthetic_history())
+    now = datetime.now()
+    timings = []
+    for _ in range(AGGREGATE_REPEATS):
+        start = clock()
+        for _ in range(AGGREGATE_BATCH):
+            parse_yearly_data(activities, now)
+        timings.append((clock() - start) / AGGREGATE_BATCH)
+    return {"seconds": statistics.median(timings)}
+
+
+def _case_render(clock, port: int, size) -> dict:
+    from PIL import Image
+    from data import dashboard_data_as_of
+    from render import ASSETS_DIR, Renderer, colorize_icon, render_dashboard
+
+    activities = _summaries(synthetic_history())
+    data = dashboard_data_as_of(activities, datetime.now())
+
+    start = clock()
+    frames = render_dashboard(*size, data)
+    first = clock() - start
+    timings = []
+    for _ in range(RENDER_REPEATS):
+        start = clock()
+        frames = render_dashboard(*size, data, frames)
+        timings.append(clock() - start)
+
+    renderer = Renderer(*size)
+    icon = Image.open(os.path.join(ASSETS_DIR, "fire.png")).convert("RGBA")
+    side = renderer._sc(64)
+    icon = icon.resize((side, side))
+    start = clock()
+    for _ in range(ICON_REPEATS):
+        colorize_icon(icon, renderer.accent_color)
+    icon_seconds = (clock() - start) / ICON_REPEATS
+
+    return {
+        "first_frame_seconds": first,
+        "seconds_per_frame": statistics.median(timings),
+        "colorize_icon_seconds": icon_seconds,
+    }
+
+
+CASES = {"fetch": _case_fetch, "aggregate": _case_aggregate, "render": _case_render}
+
+
+def _run_case(name, size, port, procs, quota, results) -> None:
+    clock = _pin_and_throttle(procs, quota)
+    metrics = CASES[name](clock, port, size)
+    # ru_maxrss is in KB on Linux
+    metrics["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    results.put(metrics)
+
+
+def measure(quota: float) -> tuple[dict, bool]:
+    work_dir = tempfile.TemporaryDirectory(prefix="strava-frame-perf-")
+    work = Path(work_dir.name)
+    config_path = work / "config.toml"
+    config_path.write_text(PERF_CONFIG)
+    os.environ["STRAVA_FRAME_CONFIG"] = str(config_path)
+    os.environ["STRAVA_FRAME_CACHE"] = str(work / "cache")
+
+    server = start_fake_strava(synthetic_history())
+    port = server.server_address[1]
+    procs = make_cpu_cgroup(quota)
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+
+    cases = [("fetch", None), ("aggregate", None)]
+    cases += [("render", size) for size in RESOLUTIONS]
+    measured = {}
+    try:
+        for name, size in cases:
+            table = f"render.{size[0]}x{size[1]}" if size else name
+            print(f"Running {table}...", file=sys.stderr)
+            process = context.Process(
+                target=_run_case, args=(name, size, port, procs, quota, results)
+            )
+            process.start()
+            process.join()
+            if process.exitcode != 0:
+                raise RuntimeError(f"{table} exited with code {process.exitcode}")
+            measured[table] = results.get()
+    finally:
+        server.shutdown()
+        work_dir.cleanup()
+        if procs is not None:
+            try:
+                procs.parent.rmdir()
+            except OSError:
+                pass
+    return measured, procs is not None
+
+
+def load_baseline() -> dict:
+    try:
+        with open(BASELINE_PATH, "rb") as f:
+            baseline = tomllib.load(f)
+    except FileNotFoundError:
+        return {}
+    # [render.800x480] and the like arrive nested under "render"
+    flat = {k: v for k, v in baseline.items() if k != "render"}
+    for size, budgets in baseline.get("render", {}).items():
+        flat[f"render.{size}"] = budgets
+    return flat
+
+
+def write_baseline(measured: dict, quota: float, headroom: float) -> None:
+    lines = [
+        "# Budgets checked by src/perf.py: seconds on an emulated Pi 2B and peak",
+        "# RSS in MB. Regenerate with `python3 src/perf.py --update` only after a",
+        "# deliberate change, and commit the result with it.",
+        "",
+        "[harness]",
+        f"cpu_quota = {quota}",
+        f"headroom = {headroom}",
+    ]
+    for table, metrics in measured.items():
+        lines += ["", f"[{table}]"]
+        for key, value in metrics.items():
+            if key.endswith("_mb"):
+                lines.append(f"{key} = {value * headroom:.1f}")
+            else:
+                budget = max(value * headroom, MIN_BUDGET_SECONDS)
+                lines.append(f"{key} = {budget:.3f}")
+    BASELINE_PATH.write_text("\n".join(lines) + "\n")
+
+
+def compare(measured: dict, baseline: dict) -> list[str]:
+    failures = []
+    for table, metrics in measured.items():
+        budgets = baseline.get(table, {})
+        for key, value in metrics.items():
+            budget = budgets.get(key)
+            status = "no budget" if budget is None else "ok"
+            if budget is not None and value > budget:
+                status = "OVER"
+                failures.append(f"{table}.{key}")
+            limit = "-" if budget is None else f"{budget:g}"
+            print(f"{table:18} {key:24} {value:10.3f} / {limit:>8}  {status}")
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Check render and fetch budgets on an emulated Raspberry Pi 2B."
+    )
+    parser.add_argument(
+        "--update", action="store_true", help="rewrite perf_baseline.toml"
+    )
+    parser.add_argument(
+        "--quota",
+        type=float,
+        help=f"fraction of one core to allow (default: the baseline's, "
+        f"else {DEFAULT_CPU_QUOTA})",
+    )
+    args = parser.parse_args()
+
+    baseline = load_baseline()
+    harness = baseline.get("harness", {})
+    quota = args.quota or harness.get("cpu_quota", DEFAULT_CPU_QUOTA)
+    if not 0 < quota <= 1:
+        parser.error("--quota must be in (0, 1]")
+    headroom = harness.get("headroom", DEFAULT_HEADROOM)
+    if headroom < 1:
+        parser.error(f"[harness] headroom in {BASELINE_PATH.name} must be at least 1")
+
+    measured, throttled = measure(quota)
+    if not throttled:
+        print(
+            "No CPU cgroup available; emulating the quota from CPU time",
+            file=sys.stderr,
+        )
+    if args.update:
+        for _ in range(UPDATE_RUNS - 1):
+            for table, metrics in measure(quota)[0].items():
+                for key, value in metrics.items():
+                    measured[table][key] = max(measured[table][key], value)
+        write_baseline(measured, quota, headroom)
+        print(f"Wrote {BASELINE_PATH.name}", file=sys.stderr)
+        return
+
+    failures = compare(measured, baseline)
+    if failures:
+        print(f"Over budget: {', '.join(failures)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Fetcher and renderer processes for split_processes mode.
+
+The fetcher keeps the data current and hands it to the renderer through
+cache/latest.pkl. The renderer turns each new version, at the size the display
+asked for, into frames in the shared FrameBuffer. The Tk process only blits
+those frames, so a crash in either worker leaves the last frames on screen.
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+import sys
+import time
+from datetime import datetime
+from multiprocessing.process import BaseProcess
+from pathlib import Path
+import config
+from cache import CACHE_DIR, load_pickle, save_pickle
+from crashlog import RESTART_ENV
+from framebuffer import FrameBuffer
+
+LATEST_FILE = "latest.pkl"
+FRAME_BUFFER_NAME = "strava-frame.buf"
+SHARED_MEMORY_DIR = Path("/dev/shm")
+RETRY_BASE_MS = 30 * 1000
+RETRY_MAX_MS = 10 * 60 * 1000
+WORKER_POLL_SECONDS = 0.25
+
+
+def is_sleep_mode() -> bool:
+    hour = datetime.now().hour
+    return config.SLEEP_MODE_ENABLED and (
+        hour >= config.SLEEP_MODE_START or hour < config.SLEEP_MODE_END
+    )
+
+
+def retry_delay_ms(failures: int) -> int:
+    return min(RETRY_MAX_MS, RETRY_BASE_MS * 2 ** (failures - 1))
+
+
+def frame_buffer_path() -> str:
+    # Shared memory, so frames never touch the SD card
+    directory = SHARED_MEMORY_DIR if SHARED_MEMORY_DIR.is_dir() else CACHE_DIR
+    directory.mkdir(exist_ok=True)
+    return str(directory / FRAME_BUFFER_NAME)
+
+
+def run_fetcher(path: str) -> None:
+    from data import import_api_modules, refresh_activities
+
+    buffer = FrameBuffer(path)
+    latest = load_pickle(LATEST_FILE) or {}
+    version = latest.get("version", 0)
+    fetched_at = latest.get("fetched_at")
+    failures = 0
+    next_fetch = time.monotonic()
+    if fetched_at and os.environ.get(RESTART_ENV):
+        # A supervised restart keeps data that is not yet due for a refresh
+        age = (datetime.now() - fetched_at).total_seconds()
+        if 0 <= age < config.REFRESH_TIME / 1000:
+            next_fetch += config.REFRESH_TIME / 1000 - age
+    buffer.set_status(fetched_at, failures)
+    seen_requests = buffer.refresh_requests()
+    watcher = config.ConfigWatcher()
+    import_api_modules()
+
+    while True:
+        if watcher.changed() and config.reload():
+            # The next refresh moves to the new interval or sleep hours
+            next_fetch = min(next_fetch, time.monotonic() + config.REFRESH_TIME / 1000)
+        requests = buffer.refresh_requests()
+        force = requests != seen_requests
+        if not force and time.monotonic() < next_fetch:
+            time.sleep(WORKER_POLL_SECONDS)
+            continue
+        seen_requests = requests
+
+        delay = config.REFRESH_TIME
+        if not is_sleep_mode():
+            try:
+                data = refresh_activities(force)
+            except Exception as e:
+                failures += 1
+                delay = retry_delay_ms(failures)
+                print(
+                    f"Refresh failed ({type(e).__name__}: {e}); "
+                    f"retrying in {delay // 1000}s",
+                    file=sys.stderr,
+                )
+            else:
+                failures = 0
+                fetched_at = datetime.now()
+                version += 1
+                save_pickle(
+                    LATEST_FILE,
+                    {"version": version, "data": data, "fetched_at": fetched_at},
+                )
+            buffer.set_status(fetched_at, failures)
+        next_fetch = time.monotonic() + delay / 1000
+
+
+def run_renderer(path: str) -> None:
+    from render import RENDER_SETTINGS, render_dashboard
+
+    buffer = FrameBuffer(path)
+    watcher = config.ConfigWatcher()
+    latest_path = CACHE_DIR / LATEST_FILE
+    rendered = None
+    frames = None
+
+    while True:
+        time.sleep(WORKER_POLL_SECONDS)
+        if watcher.changed() and (config.reload() or set()) & RENDER_SETTINGS:
+            rendered = frames = None
+        size = buffer.requested_size()
+        try:
+            stamp = latest_path.stat().st_mtime_ns
+        except OSError:
+            continue
+        if not size[0] or (stamp, size) == rendered:
+            continue
+
+        latest = load_pickle(LATEST_FILE)
+        if not latest:
+            continue
+        # The previous frames are this process's own, so they can be drawn into
+        buffers = frames if frames and frames[0].size == size else None
+        frames = render_dashboard(*size, latest["data"], buffers)
+        buffer.write(list(frames))
+        rendered = (stamp, size)
+
+
+WORKERS = {"fetcher": run_fetcher, "renderer": run_renderer}
+
+
+def start_worker(name: str, path: str) -> BaseProcess:
+    # Spawned rather than forked: workers may be restarted once Tk is running
+    process = multiprocessing.get_context("spawn").Process(
+        target=WORKERS[name], args=(path,), name=name, daemon=True
+    )
+    process.start()
+    return process
@@ -1,7 +1,20 @@
+import math
 import os
-from data import LatestActivity, refresh_activities
-from config import ACCENT_COLOR, DARK_MODE
-from datetime import datetime
+import threading
+from functools import lru_cache
+from data import (
+    DashboardData,
+    LatestActivity,
+    calculate_pace,
+    format_effort_name,
+    seconds_to_timestamp,
+)
+from efforts import PRSummary
+from history import HistorySummary
+import config
+from route import route_geometry
+from series import downsample
+from datetime import datetime, timedelta
 from PIL import Image, ImageDraw, ImageFont
 from PIL.Image import Image as PILImage
 
@@ -35,6 +48,82 @@ DARK_LABEL_COLOR = "#999999"
 DARK_CARD_COLOR = "#2B2B2B"
 DARK_BORDER_COLOR = "#404040"
 
+# The config settings Renderer falls back on; changing one invalidates frames
+RENDER_SETTINGS = frozenset(
+    {"ACCENT_COLOR", "DARK_MODE", "TREND_SMOOTHING", "MONTHLY_CHART", "OUTPUT_MODE"}
+)
+
+
+# The fonts and metric caches below are shared by every Renderer and FreeType
+# is not thread-safe; main.py renders from both the Tk and the fetch thread
+_render_lock = threading.Lock()
+
+
+def hex_to_rgb(hex_color: str) -> tuple[int, int, int]:
+    return tuple(int(hex_color[i : i + 2], 16) for i in (1, 3, 5))
+
+
+def blend_hex(hex_from: str, hex_to: str, amount: float) -> str:
+    channels = []
+    for start, end in zip(hex_to_rgb(hex_from), hex_to_rgb(hex_to)):
+        channels.append(round(start + (end - start) * amount))
+    return "#{:02x}{:02x}{:02x}".format(*channels)
+
+
+def luminance(hex_color: str) -> int:
+    r, g, b = hex_to_rgb(hex_color)
+    return (r * 299 + g * 587 + b * 114) // 1000
+
+
+@lru_cache(maxsize=None)
+def load_font(filename: str, size: int) -> ImageFont.FreeTypeFont:
+    return ImageFont.truetype(os.path.join(ASSETS_DIR, filename), size)
+
+
+@lru_cache(maxsize=2048)
+def text_bbox(font: ImageFont.FreeTypeFont, text: str) -> tuple[int, int, int, int]:
+    return font.getbbox(text, mode="L")
+
+
+def colorize_icon(icon: PILImage, hex_color: str) -> PILImage:
+    r = int(hex_color[1:3], 16)
+    g = int(hex_color[3:5], 16)
+    b = int(hex_color[5:7], 16)
+    icon = icon.convert("RGBA")
+    pixels = icon.load()
+    for y in range(icon.height):
+        for x in range(icon.width):
+            pr, pg, pb, pa = pixels[x, y]
+            brightness = (pr + pg + pb) / 3
+            pixels[x, y] = (r, g, b, int((1 - brightness / 255) * pa))
+    return icon
+
+
+# Colorizing goes pixel by pixel, so each size and color is built once; the
+# icon is shared, so callers only paste it
+@lru_cache(maxsize=16)
+def tinted_icon(filename: str, height: int, hex_color: str) -> PILImage:
+    with Image.open(os.path.join(ASSETS_DIR, filename)) as raw:
+        width = int(raw.width * height / raw.height)
+        icon = raw.convert("RGBA").resize((width, height), Image.Resampling.LANCZOS)
+    return colorize_icon(icon, hex_color)
+
+
+@lru_cache(maxsize=8)
+def cell_mask(cols: int, rows: int, cell: int, gap: int, radius: int) -> PILImage:
+    pitch = cell + gap
+    tile = Image.new("L", (pitch, pitch), 0)
+    ImageDraw.Draw(tile).rounded_rectangle(
+        [0, 0, cell - 1, cell - 1], radius=radius, fill=255
+    )
+    column = Image.new("L", (pitch, rows * pitch), 0)
+    for row in range(rows):
+        column.paste(tile, (0, row * pitch))
+    mask = Image.new("L", (cols * pitch, rows * pitch), 0)
+    for col in range(cols):
+        mask.paste(column, (col * pitch, 0))
+    return mask
+
 
 class Renderer:
     BASE_WIDTH = 800
@@ -42,18 +131,43 @@ class Renderer:
 
     LEFT_COLUMN_WIDTH_RATIO = 3
     STREAK_CARD_WIDTH_RATIO = 4
+    # Trend series are downsampled to at most one point per this many pixels
+    TREND_POINT_SPACING = 2
+    # Non-empty heatmap days are bucketed into this many accent shades
+    HEATMAP_LEVELS = 4
 
     def __init__(
         self,
         width: int,
         height: int,
-        accent_color: str = ACCENT_COLOR,
-        dark_mode: bool = DARK_MODE,
+        accent_color: str | None = None,
+        dark_mode: bool | None = None,
+        trend_smoothing: int | None = None,
+        monthly_chart: str | None = None,
+        as_of: datetime | None = None,
+        output_mode: str | None = None,
     ):
+        # Options left unset follow config.toml as of now, which may be reloaded
+        if accent_color is None:
+            accent_color = config.ACCENT_COLOR
+        if dark_mode is None:
+            dark_mode = config.DARK_MODE
+        if trend_smoothing is None:
+            trend_smoothing = config.TREND_SMOOTHING
+        if monthly_chart is None:
+            monthly_chart = config.MONTHLY_CHART
+        if output_mode is None:
+            output_mode = config.OUTPUT_MODE
+
         self.width = width
         self.height = height
         self.accent_color = accent_color
         self.dark_mode = dark_mode
+        self.trend_smoothing = trend_smoothing
+        self.monthly_chart = monthly_chart
+        # The moment being rendered; only historical renders set it
+        self.as_of = as_of
+        self.mode = output_mode
 
         self.scale = min(width / self.BASE_WIDTH, height / self.BASE_HEIGHT)
 
@@ -79,39 +193,94 @@ class Renderer:
             self.card_color = LIGHT_CARD_COLOR
             self.border_color = LIGHT_BORDER_COLOR
 
-        self.font_bold_small = ImageFont.truetype(
-            os.path.join(ASSETS_DIR, "segoeuib.ttf"), self._sc(16)
-        )
-        self.font_bold_medium = ImageFont.truetype(
-            os.path.join(ASSETS_DIR, "segoeuib.ttf"), self._sc(22)
-        )
-        self.font_bold_large = ImageFont.truetype(
-            os.path.join(ASSETS_DIR, "segoeuib.ttf"), self._sc(28)
-        )
-        self.font_bold_xlarge = ImageFont.truetype(
-            os.path.join(ASSETS_DIR, "segoeuib.ttf"), self._sc(48)
-        )
-        self.font_regular_small = ImageFont.truetype(
-            os.path.join(ASSETS_DIR, "segoeui.ttf"), self._sc(16)
-        )
-        self.font_regular_medium = ImageFont.truetype(
-            os.path.join(ASSETS_DIR, "segoeui.ttf"), self._sc(32)
-        )
-        self.font_regular_large = ImageFont.truetype(
-            os.path.join(ASSETS_DIR, "segoeui.ttf"), self._sc(48)
-        )
+        if output_mode == "1":
+            # Two inks only: paper for backgrounds, ink for everything drawn
+            paper, ink = ("#000000", "#FFFFFF") if dark_mode else ("#FFFFFF", "#000000")
+            self.bg_color = self.card_color = paper
+            self.text_color = self.label_color = self.border_color = ink
+            self.accent_color = ink
+        # Fixed leading palette entries for "P" frames; index 0 is the background
+        self.theme_palette = [
+            channel
+            for color in (
+                self.bg_color,
+                self.card_color,
+                self.text_color,
+                self.label_color,
+                self.border_color,
+                self.accent_color,
+            )
+            for channel in hex_to_rgb(color)
+        ]
+
+        self.font_bold_small = load_font("segoeuib.ttf", self._sc(16))
+        self.font_bold_medium = load_font("segoeuib.ttf", self._sc(22))
+        self.font_bold_large = load_font("segoeuib.ttf", self._sc(28))
+        self.font_bold_xlarge = load_font("segoeuib.ttf", self._sc(48))
+        self.font_regular_small = load_font("segoeui.ttf", self._sc(16))
+        self.font_regular_medium = load_font("segoeui.ttf", self._sc(32))
+        self.font_regular_large = load_font("segoeui.ttf", self._sc(48))
+
+    def _new_frame(self, buffer: PILImage | None = None) -> PILImage:
+        size = (self.width, self.height)
+        if buffer is not None and buffer.size == size and buffer.mode == self.mode:
+            img = buffer
+            img.paste(0 if self.mode == "P" else self.bg_color, (0, 0, *size))
+        else:
+            img = Image.new(self.mode, size, 0 if self.mode == "P" else self.bg_color)
+        if self.mode == "P":
+            # Drawing appends any other colors after the theme entries
+            img.putpalette(self.theme_palette)
+        return img
+
+    def _to_frame_mode(
+        self, src: PILImage, img: PILImage, dither: bool = False
+    ) -> PILImage:
+        # Only 1-bit frames dither, and only when asked
+        if self.mode == "P":
+            return src.convert("RGB").quantize(palette=img, dither=Image.Dither.NONE)
+        if self.mode == "1":
+            return src.convert("L").convert(
+                "1", dither=Image.Dither.FLOYDSTEINBERG if dither else Image.Dither.NONE
+            )
+        return src.convert(self.mode)
+
+    def _paste_icon(self, img: PILImage, icon: PILImage, pos: tuple[int, int]):
+        if self.mode == "RGB":
+            img.paste(icon, pos, icon)
+        else:
+            src = self._to_frame_mode(icon, img, dither=True)
+            img.paste(src, pos, icon.getchannel("A"))
+
+    def _fill_polygon(
+        self, draw: ImageDraw.Draw, img: PILImage, points: list, color: str
+    ):
+        if self.mode != "1":
+            draw.polygon(points, fill=color)
+            return
+        xs = [x for x, _ in points]
+        ys = [y for _, y in points]
+        left, top = int(min(xs)), int(min(ys))
+        size = (int(max(xs)) - left + 1, int(max(ys)) - top + 1)
+        mask = Image.new("L", size, 0)
+        ImageDraw.Draw(mask).polygon([(x - left, y - top) for x, y in points], fill=255)
+        shade = Image.new("L", size, luminance(color))
+        img.paste(shade.convert("1"), (left, top), mask)
+
+    def _now(self) -> datetime:
+        return self.as_of or datetime.now()
 
     def _sc(self, value: float) -> int:
         return round(value * self.scale)
 
     def _text_size(self, draw: ImageDraw.Draw, text: str, font) -> tuple[int, int]:
-        bbox = draw.textbbox((0, 0), text, font=font)
+        bbox = text_bbox(font, text)
         return bbox[2] - bbox[0], bbox[3] - bbox[1]
 
     def _draw_text_centered(
         self, draw: ImageDraw.Draw, text: str, font, center_x: int, y: int, color: str
     ):
-        bbox = draw.textbbox((0, 0), text, font=font)
+        bbox = text_bbox(font, text)
         x = center_x - (bbox[2] - bbox[0]) // 2 - bbox[0]
         draw.text((x, y), text, font=font, fill=color)
 
@@ -123,19 +292,6 @@ class Renderer:
             [x0, y0, x1, y1], radius=self._sc(8), outline=self.border_color, width=1
         )
 
-    def _colorize_icon(self, icon: Image.Image, hex_color: str) -> Image.Image:
-        r = int(hex_color[1:3], 16)
-        g = int(hex_color[3:5], 16)
-        b = int(hex_color[5:7], 16)
-        icon = icon.convert("RGBA")
-        pixels = icon.load()
-        for y in range(icon.height):
-            for x in range(icon.width):
-                pr, pg, pb, pa = pixels[x, y]
-                brightness = (pr + pg + pb) / 3
-                pixels[x, y] = (r, g, b, int((1 - brightness / 255) * pa))
-        return icon
-
     def _draw_header(self, draw: ImageDraw.Draw):
         draw.rectangle(
             [(0, 0), (self.width, self.header_height)], fill=self.accent_color
@@ -172,6 +328,19 @@ class Renderer:
 
     def _draw_left_column(
         self, draw: ImageDraw.Draw, total_mileage, weekly_mileage, activities
+    ) -> int:
+        return self._draw_stats_column(
+            draw,
+            f"{self._now().year} Stats",
+            [
+                (total_mileage, "Miles", True),
+                (weekly_mileage, "Miles per Week", True),
+                (activities, "Activities", False),
+            ],
+        )
+
+    def _draw_stats_column(
+        self, draw: ImageDraw.Draw, title: str, stats: list[tuple]
     ) -> int:
         left_width = self.width // self.LEFT_COLUMN_WIDTH_RATIO
         x0 = self.margin
@@ -180,7 +349,6 @@ class Renderer:
         y1 = self.height - self.margin
         self._draw_card(draw, x0, y0, x1, y1)
 
-        title = f"{datetime.now().year} Stats"
         title_x = x0 + self.inner_padding
         title_y = y0 + self.inner_padding
         draw.text(
@@ -189,15 +357,9 @@ class Renderer:
 
         _, title_h = self._text_size(draw, title, self.font_bold_medium)
         metrics_top = title_y + title_h + self.title_bottom_padding
-        section_h = (y1 - metrics_top - self.inner_padding) / 3
+        section_h = (y1 - metrics_top - self.inner_padding) / len(stats)
         center_x = (x0 + x1) // 2
 
-        stats = [
-            (total_mileage, "Miles", True),
-            (weekly_mileage, "Miles per Week", True),
-            (activities, "Activities", False),
-        ]
-
         for i, (value, label, decimal) in enumerate(stats):
             value_text = f"{value:.2f}" if decimal else str(value)
             _, value_h = self._text_size(draw, value_text, self.font_regular_large)
@@ -213,7 +375,7 @@ class Renderer:
                 decimal,
             )
 
-        for i in range(1, 3):
+        for i in range(1, len(stats)):
             y = metrics_top + i * section_h
             draw.line(
                 [
@@ -299,6 +461,120 @@ class Renderer:
 
         return y1
 
+    def _heatmap_palette(self) -> list[int]:
+        # 0 = rest day, 1..HEATMAP_LEVELS = accent shades, then future
+        colors = [blend_hex(self.card_color, self.label_color, 0.25)]
+        for level in range(1, self.HEATMAP_LEVELS + 1):
+            colors.append(
+                blend_hex(
+                    self.card_color,
+                    self.accent_color,
+                    0.25 + 0.75 * level / self.HEATMAP_LEVELS,
+                )
+            )
+        colors.append(self.card_color)
+        return [channel for color in colors for channel in hex_to_rgb(color)]
+
+    def _draw_heatmap_calendar(
+        self,
+        draw: ImageDraw.Draw,
+        img: Image.Image,
+        history: HistorySummary,
+        left_width: int,
+    ) -> int:
+        x0 = left_width + self.margin
+        y0 = self.header_height + self.margin
+        x1 = self.width - self.margin
+        y1 = self.height - self.graph_bottom_offset
+        self._draw_card(draw, x0, y0, x1, y1)
+
+        daily = history["daily_miles"]
+        start = history["calendar_start"]
+        rows = 7
+        cols = max(1, -(-len(daily) // rows))
+
+        inner_y0 = y0 + self.inner_padding
+        inner_y1 = y1 - self.inner_padding
+        title = "Last 52 Weeks"
+        draw.text(
+            (x0 + self.inner_padding - self._sc(2), inner_y0),
+            title,
+            font=self.font_bold_medium,
+            fill=self.text_color,
+        )
+        _, title_h = self._text_size(draw, title, self.font_bold_medium)
+        total = f"{round(sum(daily))} mi"
+        total_w, _ = self._text_size(draw, total, self.font_bold_small)
+        draw.text(
+            (x1 - self.inner_padding - total_w, inner_y0 + self._sc(4)),
+            total,
+            font=self.font_bold_small,
+            fill=self.label_color,
+        )
+
+        grid_top = inner_y0 + title_h + self.inner_padding
+        grid_bottom = inner_y1 - self._sc(20)
+        pitch = max(
+            2,
+            min(
+                (x1 - x0 - 2 * self.inner_padding) // cols,
+                (grid_bottom - grid_top) // rows,
+            ),
+        )
+        gap = max(1, pitch // 6)
+        cell = pitch - gap
+        grid_w = cols * pitch - gap
+        gx = x0 + (x1 - x0 - grid_w) // 2
+        gy = grid_top + (grid_bottom - grid_top - (rows * pitch - gap)) // 2
+
+        max_val = max(daily, default=0) or 1
+        levels = [
+            min(self.HEATMAP_LEVELS, math.ceil(miles / max_val * self.HEATMAP_LEVELS))
+            for miles in daily
+        ]
+        future = self.HEATMAP_LEVELS + 1
+        levels += [future] * (cols * rows - len(levels))
+
+        # Day i sits at (column i // 7, row i % 7): lay the levels out as rows of
+        # weeks, then transpose so weeks run left to right
+        palette = self._heatmap_palette()
+        grid = Image.frombytes("P", (rows, cols), bytes(levels))
+        grid.putpalette(palette)
+        grid = grid.transpose(Image.Transpose.TRANSPOSE).resize(
+            (cols * pitch, rows * pitch), Image.Resampling.NEAREST
+        )
+        if self.mode == "P":
+            # Give every shade its own entry so quantizing keeps them distinct
+            for i in range(0, len(palette), 3):
+                draw.palette.getcolor(tuple(palette[i : i + 3]), img)
+        img.paste(
+            self._to_frame_mode(grid, img, dither=True),
+            (gx, gy),
+            cell_mask(cols, rows, cell, gap, max(0, cell // 5)),
+        )
+
+        label_y = gy + rows * pitch + self._sc(2)
+        next_free_x = x0
+        for col in range(cols):
+            week = start + timedelta(weeks=col)
+            week_end = week + timedelta(days=6)
+            if week.day != 1 and week_end.month == week.month:
+                continue
+            month = MONTHS[week_end.month - 1]
+            label_x = gx + col * pitch
+            if label_x < next_free_x:
+                continue
+            draw.text(
+                (label_x, label_y),
+                month,
+                font=self.font_regular_small,
+                fill=self.label_color,
+            )
+            month_w, _ = self._text_size(draw, month, self.font_regular_small)
+            next_free_x = label_x + month_w + self._sc(4)
+
+        return y1
+
     def _draw_streak(
         self,
         draw: ImageDraw.Draw,
@@ -319,8 +595,6 @@ class Renderer:
         area_y1 = area_y0 + self.bottom_row_height
         area_w = area_x1 - area_x0
 
-        fire_raw = Image.open(os.path.join(ASSETS_DIR, "fire.png")).convert("RGBA")
-
         weeks_text = "Weeks" if streak != 1 else "Week"
         label_w, label_h = self._text_size(draw, weeks_text, self.font_bold_small)
         label_y = area_y1 - self.inner_padding - label_h
@@ -328,18 +602,13 @@ class Renderer:
         if fire_zone_h <= 0:
             return
 
-        fire_scale = fire_zone_h / fire_raw.height
-        fire_w = int(fire_raw.width * fire_scale)
-        fire_h = int(fire_raw.height * fire_scale)
-        fire_img = self._colorize_icon(
-            fire_raw.resize((fire_w, fire_h), Image.Resampling.LANCZOS),
-            self.accent_color,
-        )
+        fire_img = tinted_icon("fire.png", fire_zone_h, self.accent_color)
+        fire_w, fire_h = fire_img.size
 
-        img.paste(
+        self._paste_icon(
+            img,
             fire_img,
             (area_x0 + (area_w - fire_w) // 2, area_y0 + (fire_zone_h - fire_h) // 2),
-            fire_img,
         )
 
         streak_text = str(streak)
@@ -399,10 +668,8 @@ class Renderer:
             pr_w, _ = self._text_size(draw, pr, self.font_regular_small)
             block_w = max(medal_w, pr_w)
             block_left = x1 - self.inner_padding - block_w
-            img.paste(
-                medal_img,
-                (block_left + (block_w - medal_w) // 2, inner_y0),
-                medal_img,
+            self._paste_icon(
+                img, medal_img, (block_left + (block_w - medal_w) // 2, inner_y0)
             )
             draw.text(
                 (block_left + (block_w - pr_w) // 2, inner_y0 + medal_h),
@@ -411,6 +678,22 @@ class Renderer:
                 fill=self.label_color,
             )
 
+        polyline = activity.get("polyline")
+        if polyline:
+            route_size = self._sc(44)
+            title_w, _ = self._text_size(draw, title, self.font_bold_medium)
+            route_right = block_left - self._sc(8) if pr else x1 - self.inner_padding
+            route_left = route_right - route_size
+            if route_left > inner_x + title_w + self._sc(8):
+                self._draw_route(
+                    draw,
+                    activity.get("id", 0),
+                    polyline,
+                    route_left,
+                    inner_y0,
+                    route_size,
+                )
+
         date_y = inner_y0 + title_h + self._sc(6)
         draw.text(
             (inner_x, date_y + self._sc(5)),
@@ -469,6 +752,25 @@ class Renderer:
                     fill=self.border_color,
                     width=1,
                 )
+    def _draw_route(
+        self,
+        draw: ImageDraw.Draw,
+        activity_id: int,
+        polyline: str,
+        x: int,
+        y: int,
+        size: int,
+    ):
+        points = route_geometry(activity_id, polyline, (size, size), self._sc(2))
+        if len(points) < 2:
+            return
+        draw.line(
+            [(x + px, y + py) for px, py in points],
+            fill=self.accent_color,
+            width=max(1, self._sc(2)),
+            joint="curve",
+        )
+
     def lighten_hex(self, hex_color, amount=0.5):
         """
         amount: 0 → no change, 1 → white
@@ -489,6 +791,7 @@ class Renderer:
     def _draw_trend_line_card(
         self,
         draw: ImageDraw.Draw,
+        img: Image.Image,
         data: list[float],
         title: str,
         x0: int,
@@ -530,44 +833,28 @@ class Renderer:
             )
             return
 
-        min_val = min(data)
-        max_val = max(data)
+        # Draw cost is bounded by the plot width, not the number of activities
+        points = downsample(
+            data, max(2, plot_w // self.TREND_POINT_SPACING), self.trend_smoothing
+        )
+        values = [v for _, v in points]
+        min_val = min(values)
+        max_val = max(values)
         val_range = max_val - min_val or 1
+        last_idx = len(data) - 1
 
         def to_px(val: float, idx: int) -> tuple[int, int]:
-            px = plot_left + int(idx / (len(data) - 1) * plot_w)
+            px = plot_left + int(idx / last_idx * plot_w)
             py = plot_bottom - int((val - min_val) / val_range * plot_h)
             return px, py
 
-        # Filled area under the curve
-        accent_r = int(self.accent_color[1:3], 16)
-        accent_g = int(self.accent_color[3:5], 16)
-        accent_b = int(self.accent_color[5:7], 16)
-
-        fill_img = Image.new("RGBA", (x1 - x0, y1 - y0), (0, 0, 0, 0))
-        fill_draw = ImageDraw.Draw(fill_img)
-
-        poly_points = [(to_px(v, i)[0] - x0, to_px(v, i)[1] - y0) for i, v in enumerate(data)]
-        poly_points = [(plot_left - x0, plot_bottom - y0)] + poly_points + [(plot_right - x0, plot_bottom - y0)]
-        fill_draw.polygon(poly_points, fill=(accent_r, accent_g, accent_b, 40))
-
-        # Compose fill onto the base card (RGBA -> RGB merge)
-        base_rgba = Image.new("RGBA", (x1 - x0, y1 - y0), (0, 0, 0, 0))
-        base_rgba = Image.alpha_composite(base_rgba, fill_img)
-        # We need to paste onto the main draw's image — caller handles that via returned overlay
-        # Instead, draw directly with a semi-transparent workaround using repeated thin rects
-        for i, v in enumerate(data):
+        # Thin accent rects from each point down to the baseline
+        for i, v in points:
             px, py = to_px(v, i)
-            alpha_steps = 3
-            for step in range(alpha_steps):
-                draw.rectangle(
-                    [px - x0 + x0, py, px - x0 + x0 + 1, plot_bottom],
-                    fill=self.accent_color,
-                )
-            # Overwrite with card color for a "fade" effect using vertical gradient rects
+            draw.rectangle([px, py, px + 1, plot_bottom], fill=self.accent_color)
         # Draw filled area as a polygon approximation with card-blended color
         # Use a simple horizontal slice approach for the fill
-        line_points = [to_px(v, i) for i, v in enumerate(data)]
+        line_points = [to_px(v, i) for i, v in points]
         for i in range(len(line_points) - 1):
             lx0, ly0 = line_points[i]
             lx1, ly1 = line_points[i + 1]
@@ -577,8 +864,11 @@ class Renderer:
             )
 
         fill_color_light = self.lighten_hex(self.accent_color, 0.6)
+        if self.mode == "1":
+            # Lightening ink can land on paper; a mid shade always dithers
+            fill_color_light = blend_hex(self.card_color, self.accent_color, 0.4)
         poly_fill = [(plot_left, plot_bottom)] + line_points + [(plot_right, plot_bottom)]
-        draw.polygon(poly_fill, fill=fill_color_light)
+        self._fill_polygon(draw, img, poly_fill, fill_color_light)
 
         # Re-draw the card background above the line to create a "fill only below" look
         # by drawing card-colored polygons above each segment
@@ -613,9 +903,10 @@ class Renderer:
         weekly_mileage_trend: list[float],
         cadence_trend: list[float],
         heart_rate_trend: list[float],
+        buffer: PILImage | None = None,
     ) -> PILImage:
         """Render a 2x2 grid of trend line cards (4th cell left empty)."""
-        img = Image.new("RGB", (self.width, self.height), self.bg_color)
+        img = self._new_frame(buffer)
         draw = ImageDraw.Draw(img)
 
         self._draw_header(draw)
@@ -667,10 +958,215 @@ class Renderer:
         ]
 
         for (x0, y0, x1, y1), (data, title) in zip(cells, trend_cards):
-            self._draw_trend_line_card(draw, data, title, x0, y0, x1, y1)
+            self._draw_trend_line_card(draw, img, data, title, x0, y0, x1, y1)
 
         return img
 
+    def _draw_year_over_year_image(
+        self, history: HistorySummary, buffer: PILImage | None = None
+    ) -> PILImage:
+        img = self._new_frame(buffer)
+        draw = ImageDraw.Draw(img)
+
+        self._draw_header(draw)
+
+        first_date = history.get("first_date")
+        left_width = self._draw_stats_column(
+            draw,
+            "Lifetime",
+            [
+                (history.get("lifetime_miles", 0), "Miles", True),
+                (history.get("lifetime_activities", 0), "Activities", False),
+                (
+                    first_date.year if first_date else self._now().year,
+                    "First Activity",
+                    False,
+                ),
+            ],
+        )
+
+        x0 = left_width + self.margin
+        y0 = self.header_height + self.margin
+        x1 = self.width - self.margin
+        y1 = self.height - self.margin
+        self._draw_card(draw, x0, y0, x1, y1)
+
+        inner_x0 = x0 + self.inner_padding
+        inner_x1 = x1 - self.inner_padding
+        inner_y0 = y0 + self.inner_padding
+        inner_y1 = y1 - self.inner_padding
+
+        title = "Year over Year"
+        draw.text(
+            (inner_x0, inner_y0), title, font=self.font_bold_medium, fill=self.text_color
+        )
+        _, title_h = self._text_size(draw, title, self.font_bold_medium)
+
+        current_year = self._now().year
+        monthly = history.get("monthly_miles", {})
+        years = [y for y in history.get("years", []) if y != current_year]
+
+        legend = [(str(current_year), self.accent_color)]
+        if years:
+            span = str(years[0]) if len(years) == 1 else f"{years[0]}–{years[-1]}"
+            legend.insert(0, (span, self.label_color))
+        legend_x = inner_x1
+        for text, color in reversed(legend):
+            text_w, _ = self._text_size(draw, text, self.font_bold_small)
+            legend_x -= text_w
+            draw.text((legend_x, inner_y0), text, font=self.font_bold_small, fill=color)
+            legend_x -= self._sc(12)
+
+        plot_top = inner_y0 + title_h + self.inner_padding + self._sc(10)
+        plot_bottom = inner_y1 - self._sc(20)
+        # Inset so the first and last month labels stay inside the card
+        plot_left = inner_x0 + self._sc(16)
+        plot_right = inner_x1 - self._sc(16)
+        plot_h = plot_bottom - plot_top
+        step = (plot_right - plot_left) / 11
+
+        max_val = max((max(monthly[y]) for y in monthly), default=0) or 1
+
+        def to_points(values: list[float]) -> list[tuple[int, int]]:
+            return [
+                (
+                    round(plot_left + i * step),
+                    round(plot_bottom - (v / max_val) * plot_h),
+                )
+                for i, v in enumerate(values)
+            ]
+
+        draw.line(
+            [(plot_left, plot_bottom), (plot_right, plot_bottom)],
+            fill=self.border_color,
+            width=1,
+        )
+
+        # Older years fade toward the card color
+        for age, year in enumerate(reversed(years)):
+            color = self._blend(
+                self.label_color, self.card_color, min(0.8, age / max(1, len(years)))
+            )
+            draw.line(to_points(monthly[year]), fill=color, width=max(1, self._sc(2)))
+
+        if current_year in monthly:
+            points = to_points(monthly[current_year][: self._now().month])
+            line_thickness = max(2, self._sc(3))
+            if len(points) > 1:
+                draw.line(points, fill=self.accent_color, width=line_thickness)
+            dot_r = max(3, self._sc(3))
+            for px, py in points:
+                draw.ellipse(
+                    [(px - dot_r, py - dot_r), (px + dot_r, py + dot_r)],
+                    fill=self.accent_color,
+                )
+
+        for i, month in enumerate(MONTHS):
+            self._draw_text_centered(
+                draw,
+                month,
+                self.font_regular_small,
+                round(plot_left + i * step),
+                plot_bottom + self._sc(4),
+                self.label_color,
+            )
+
+        return img
+
+    def _draw_records_image(
+        self, records: PRSummary, buffer: PILImage | None = None
+    ) -> PILImage:
+        img = self._new_frame(buffer)
+        draw = ImageDraw.Draw(img)
+
+        self._draw_header(draw)
+
+        latest = records.get("latest")
+        left_width = self._draw_stats_column(
+            draw,
+            "Records",
+            [
+                (records.get("pr_count", 0), "PRs Set", False),
+                (records.get("pr_count_this_year", 0), "PRs This Year", False),
+                (
+                    format_effort_name(latest["name"]) if latest else "—",
+                    "Latest PR",
+                    False,
+                ),
+            ],
+        )
+
+        x0 = left_width + self.margin
+        y0 = self.header_height + self.margin
+        x1 = self.width - self.margin
+        y1 = self.height - self.margin
+        self._draw_card(draw, x0, y0, x1, y1)
+
+        inner_x0 = x0 + self.inner_padding
+        inner_x1 = x1 - self.inner_padding
+        inner_y0 = y0 + self.inner_padding
+        inner_y1 = y1 - self.inner_padding
+
+        title = "Personal Records"
+        draw.text(
+            (inner_x0, inner_y0), title, font=self.font_bold_medium, fill=self.text_color
+        )
+        _, title_h = self._text_size(draw, title, self.font_bold_medium)
+
+        bests = records.get("bests", [])
+        table_top = inner_y0 + title_h + self.title_bottom_padding + self._sc(6)
+        if not bests:
+            draw.text(
+                (inner_x0, table_top),
+                "No best efforts yet",
+                font=self.font_regular_small,
+                fill=self.label_color,
+            )
+            return img
+
+        row_h = min(self._sc(30), (inner_y1 - table_top) // len(bests))
+        columns = [inner_x0, inner_x0 + (inner_x1 - inner_x0) * 0.3]
+        columns.append(columns[1] + (inner_x1 - inner_x0) * 0.25)
+        latest_id = latest["activity_id"] if latest else None
+
+        for i, effort in enumerate(bests):
+            y = table_top + i * row_h
+            pace = calculate_pace(effort["meters"], effort["seconds"])
+            cells = [
+                format_effort_name(effort["name"]),
+                seconds_to_timestamp(effort["seconds"]),
+                f"{seconds_to_timestamp(pace)} /mi",
+            ]
+            color = (
+                self.accent_color
+                if effort["activity_id"] == latest_id
+                else self.text_color
+            )
+            for x, text in zip(columns, cells):
+                draw.text((x, y), text, font=self.font_regular_small, fill=color)
+            day = effort["date"].strftime("%b %-d, %Y")
+            day_w, _ = self._text_size(draw, day, self.font_regular_small)
+            draw.text(
+                (inner_x1 - day_w, y),
+                day,
+                font=self.font_regular_small,
+                fill=self.label_color,
+            )
+            if i:
+                draw.line(
+                    [(inner_x0, y - self._sc(4)), (inner_x1, y - self._sc(4))],
+                    fill=self.border_color,
+                    width=1,
+                )
+
+        return img
+
+    def _blend(self, hex_from: str, hex_to: str, amount: float) -> str:
+        color = blend_hex(hex_from, hex_to, amount)
+        if self.mode == "1":
+            return "#000000" if luminance(color) < 128 else "#FFFFFF"
+        return color
+
     def render(
         self,
         total_mileage: float,
@@ -683,15 +1179,23 @@ class Renderer:
         weekly_mileage_trend: list[float] | None = None,
         cadence_trend: list[float] | None = None,
         heart_rate_trend: list[float] | None = None,
-    ) -> tuple[PILImage, PILImage]:
-        img = Image.new("RGB", (self.width, self.height), self.bg_color)
+        history: HistorySummary | None = None,
+        records: PRSummary | None = None,
+        buffers: tuple[PILImage, ...] | None = None,
+    ) -> tuple[PILImage, PILImage, PILImage, PILImage]:
+        # buffers, if given, are previous frames to draw over
+        buffers = buffers or (None, None, None, None)
+        img = self._new_frame(buffers[0])
         draw = ImageDraw.Draw(img)
 
         self._draw_header(draw)
         left_width = self._draw_left_column(
             draw, total_mileage, weekly_mileage, activities
         )
-        graph_bottom = self._draw_monthly_graph(draw, mileage_per_month, left_width)
+        if self.monthly_chart == "heatmap" and history and "daily_miles" in history:
+            graph_bottom = self._draw_heatmap_calendar(draw, img, history, left_width)
+        else:
+            graph_bottom = self._draw_monthly_graph(draw, mileage_per_month, left_width)
         self._draw_latest_activity(
             draw, img, latest_activity, left_width, top_offset=graph_bottom
         )
@@ -702,12 +1206,21 @@ class Renderer:
             weekly_mileage_trend or [],
             cadence_trend or [],
             heart_rate_trend or [],
+            buffer=buffers[1],
         )
+        history_img = self._draw_year_over_year_image(history or {}, buffers[2])
+        records_img = self._draw_records_image(records or {}, buffers[3])
 
-        return img, trends_img
+        return img, trends_img, history_img, records_img
 
 
-def generate_image(width: int, height: int) -> tuple[PILImage, PILImage]:
+def render_dashboard(
+    width: int,
+    height: int,
+    data: DashboardData,
+    buffers: tuple[PILImage, ...] | None = None,
+    as_of: datetime | None = None,
+) -> tuple[PILImage, PILImage, PILImage, PILImage]:
     (
         total_activities,
         total_miles,
@@ -719,20 +1232,26 @@ def generate_image(width: int, height: int) -> tuple[PILImage, PILImage]:
         heart_rate_trend,
         latest_activity,
         streak,
-    ) = refresh_activities()
-    renderer = Renderer(width, height)
-    return renderer.render(
-        total_miles,
-        avg_weekly_miles,
-        total_activities,
-        miles_per_month,
-        latest_activity,
-        streak,
-        pace_trend=pace_trend,
-        weekly_mileage_trend=weekly_mileage_trend,
-        cadence_trend=cadence_trend,
-        heart_rate_trend=heart_rate_trend,
-    )
+        history,
+        records,
+    ) = data
+    with _render_lock:
+        renderer = Renderer(width, height, as_of=as_of)
+        return renderer.render(
+            total_miles,
+            avg_weekly_miles,
+            total_activities,
+            miles_per_month,
+            latest_activity,
+            streak,
+            pace_trend=pace_trend,
+            weekly_mileage_trend=weekly_mileage_trend,
+            cadence_trend=cadence_trend,
+            heart_rate_trend=heart_rate_trend,
+            history=history,
+            records=records,
+            buffers=buffers,
+        )
 
 
 def generate_sleep_image(width: int, height: int) -> PILImage:
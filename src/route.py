@@ -0,0 +1,99 @@
+import math
+from functools import lru_cache
+from itertools import accumulate
+
+Point = tuple[float, float]
+
+# Encoded polyline characters carry 5-bit chunks offset by 63
+_UNSHIFT = bytes((b - 63) & 0xFF for b in range(256))
+# Simplified routes keep no detail finer than this many pixels
+SIMPLIFY_TOLERANCE = 0.5
+
+
+def decode_polyline(encoded: str, precision: int = 5) -> list[Point]:
+    deltas = []
+    value = shift = 0
+    for chunk in encoded.encode("ascii").translate(_UNSHIFT):
+        value |= (chunk & 0x1F) << shift
+        if chunk & 0x20:
+            shift += 5
+            continue
+        deltas.append(~(value >> 1) if value & 1 else value >> 1)
+        value = shift = 0
+
+    factor = 10**precision
+    pairs = len(deltas) // 2
+    lats = accumulate(deltas[0 : 2 * pairs : 2])
+    lngs = accumulate(deltas[1 : 2 * pairs : 2])
+    return [(lat / factor, lng / factor) for lat, lng in zip(lats, lngs)]
+
+
+def project(
+    coords: list[Point], width: int, height: int, padding: int = 0
+) -> list[Point]:
+    # Equirectangular around the mean latitude; fine at activity scale
+    if not coords:
+        return []
+    mean_lat = math.radians(sum(lat for lat, _ in coords) / len(coords))
+    x_scale = math.cos(mean_lat)
+    xs = [lng * x_scale for _, lng in coords]
+    ys = [-lat for lat, _ in coords]
+
+    min_x, min_y = min(xs), min(ys)
+    span_x = max(xs) - min_x
+    span_y = max(ys) - min_y
+    avail_w = width - 2 * padding
+    avail_h = height - 2 * padding
+    scale = min(
+        avail_w / span_x if span_x else math.inf,
+        avail_h / span_y if span_y else math.inf,
+    )
+    if scale == math.inf:
+        scale = 0.0
+    offset_x = padding + (avail_w - span_x * scale) / 2
+    offset_y = padding + (avail_h - span_y * scale) / 2
+    return [
+        (offset_x + (x - min_x) * scale, offset_y + (y - min_y) * scale)
+        for x, y in zip(xs, ys)
+    ]
+
+
+def _segment_distance(p: Point, a: Point, b: Point) -> float:
+    dx, dy = b[0] - a[0], b[1] - a[1]
+    if dx == 0 and dy == 0:
+        return math.hypot(p[0] - a[0], p[1] - a[1])
+    t = ((p[0] - a[0]) * dx + (p[1] - a[1]) * dy) / (dx * dx + dy * dy)
+    t = max(0.0, min(1.0, t))
+    return math.hypot(p[0] - a[0] - t * dx, p[1] - a[1] - t * dy)
+
+
+def douglas_peucker(points: list[Point], tolerance: float) -> list[Point]:
+    if len(points) < 3:
+        return list(points)
+
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        start, end = stack.pop()
+        best_dist = tolerance
+        best = None
+        for i in range(start + 1, end):
+            dist = _segment_distance(points[i], points[start], points[end])
+            if dist > best_dist:
+                best_dist = dist
+                best = i
+        if best is not None:
+            keep[best] = True
+            stack.append((start, best))
+            stack.append((best, end))
+    return [point for point, kept in zip(points, keep) if kept]
+
+
+@lru_cache(maxsize=16)
+def route_geometry(
+    activity_id: int, polyline: str, size: tuple[int, int], padding: int = 0
+) -> tuple[Point, ...]:
+    coords = decode_polyline(polyline)
+    points = project(coords, size[0], size[1], padding)
+    return tuple(douglas_peucker(points, SIMPLIFY_TOLERANCE))
@@ -0,0 +1,58 @@
+Point = tuple[float, float]
+
+
+def rolling_average(data: list[float], window: int) -> list[float]:
+    if window <= 1:
+        return list(data)
+    averaged = []
+    total = 0.0
+    for i, value in enumerate(data):
+        total += value
+        if i >= window:
+            total -= data[i - window]
+        averaged.append(total / min(i + 1, window))
+    return averaged
+
+
+def lttb(points: list[Point], threshold: int) -> list[Point]:
+    # Largest-Triangle-Three-Buckets, which keeps peaks and overall shape
+    n = len(points)
+    if threshold >= n or threshold < 3:
+        return list(points)
+
+    sampled = [points[0]]
+    bucket_size = (n - 2) / (threshold - 2)
+    kept = 0
+
+    for i in range(threshold - 2):
+        next_start = int((i + 1) * bucket_size) + 1
+        next_end = min(int((i + 2) * bucket_size) + 1, n)
+        next_bucket = points[next_start:next_end]
+        avg_x = sum(p[0] for p in next_bucket) / len(next_bucket)
+        avg_y = sum(p[1] for p in next_bucket) / len(next_bucket)
+
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+        ax, ay = points[kept]
+        best_area = -1.0
+        best = start
+        for j in range(start, end):
+            px, py = points[j]
+            area = abs((ax - avg_x) * (py - ay) - (ax - px) * (avg_y - ay))
+            if area > best_area:
+                best_area = area
+                best = j
+
+        sampled.append(points[best])
+        kept = best
+
+    sampled.append(points[-1])
+    return sampled
+
+
+def downsample(
+    data: list[float], max_points: int, smoothing_window: int = 0
+) -> list[Point]:
+    if smoothing_window > 1:
+        data = rolling_average(data, smoothing_window)
+    return lttb(list(enumerate(data)), max_points)
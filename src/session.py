@@ -0,0 +1,34 @@
+import requests
+from requests.adapters import HTTPAdapter
+
+STRAVA_HOST = "https://www.strava.com"
+POOL_SIZE = 4
+
+_session: requests.Session | None = None
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    # stravalib sets no timeout, so a stalled fetch would hang
+    def __init__(self, timeout: float, *args, **kwargs):
+        self.timeout = timeout
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        return super().send(request, **kwargs)
+
+
+def get_session(timeout: float, pool_size: int = POOL_SIZE) -> requests.Session:
+    # Keep-alive, so a steady refresh reuses a warm TLS connection
+    global _session
+    if _session is None:
+        session = requests.Session()
+        adapter = TimeoutHTTPAdapter(
+            timeout, pool_connections=1, pool_maxsize=pool_size, pool_block=True
+        )
+        session.mount(STRAVA_HOST, adapter)
+        session.headers["Accept-Encoding"] = "gzip, deflate"
+        session.headers["Connection"] = "keep-alive"
+        _session = session
+    return _session
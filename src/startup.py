@@ -0,0 +1,4 @@
+import time
+
+# Imported first by main.py, so the first-frame timing includes every import
+STARTED_AT = time.perf_counter()
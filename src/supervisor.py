@@ -0,0 +1,99 @@
+"""Run the dashboard and bring it back when it crashes.
+
+    python3 src/supervisor.py
+
+The dashboard runs as a child process. Closing it with ✕ (exit code 0) stops
+the supervisor too; any other exit restarts it after a backoff that doubles
+while it keeps crashing soon after starting. A restarted child comes up warm:
+the token, activity caches, aggregates and last frames are all on disk in
+cache/, and it is told it was restarted so it skips the refresh it would
+otherwise start with.
+"""
+
+from __future__ import annotations
+
+import collections
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from crashlog import RESTART_ENV, record_crash
+
+MAIN = Path(__file__).parent / "main.py"
+BACKOFF_BASE_SECONDS = 5
+BACKOFF_MAX_SECONDS = 10 * 60
+# A child that ran this long before exiting resets the backoff
+STABLE_SECONDS = 10 * 60
+# Lines of the child's stderr kept for crashes it could not report itself
+STDERR_TAIL_LINES = 50
+
+
+def _pump_stderr(stream, tail: collections.deque) -> None:
+    for line in stream:
+        sys.stderr.write(line)
+        tail.append(line)
+
+
+def run_child(restarts: int) -> tuple[int, float, str]:
+    env = dict(os.environ, **{RESTART_ENV: str(restarts)})
+    started = time.monotonic()
+    child = subprocess.Popen(
+        [sys.executable, str(MAIN)],
+        env=env,
+        stderr=subprocess.PIPE,
+        text=True,
+        errors="replace",
+    )
+    tail: collections.deque = collections.deque(maxlen=STDERR_TAIL_LINES)
+    pump = threading.Thread(target=_pump_stderr, args=(child.stderr, tail), daemon=True)
+    pump.start()
+
+    def forward(signum, frame):
+        child.send_signal(signum)
+
+    previous = signal.signal(signal.SIGTERM, forward)
+    try:
+        code = child.wait()
+    except KeyboardInterrupt:
+        child.send_signal(signal.SIGINT)
+        code = child.wait()
+    finally:
+        signal.signal(signal.SIGTERM, previous)
+    pump.join(timeout=1)
+    return code, time.monotonic() - started, "".join(tail)
+
+
+def backoff_seconds(crashes: int) -> int:
+    return min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** (crashes - 1))
+
+
+def main() -> None:
+    restarts = 0
+    crashes = 0
+    while True:
+        code, ran_for, tail = run_child(restarts)
+        if code == 0 or code == -signal.SIGTERM:
+            return
+
+        crashes = 1 if ran_for >= STABLE_SECONDS else crashes + 1
+        delay = backoff_seconds(crashes)
+        status = f"signal {-code}" if code < 0 else f"code {code}"
+        message = (
+            f"Dashboard exited with {status} after {ran_for:.0f}s; "
+            f"restarting in {delay}s"
+        )
+        print(message, file=sys.stderr)
+        # A child killed by a signal never got to log its own traceback
+        record_crash(f"{message}\n{tail}" if code < 0 else message)
+        try:
+            time.sleep(delay)
+        except KeyboardInterrupt:
+            return
+        restarts += 1
+
+
+if __name__ == "__main__":
+    main()
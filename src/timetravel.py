@@ -0,0 +1,167 @@
+"""Render the dashboard as it looked at past moments, e.g. for a year in review.
+
+    python3 src/timetravel.py --year 2025 --every week --out review/
+
+One frame is written per week (or month) end, rendered from a single loaded
+history in a pool of worker processes. The history comes from a bulk export
+(--export) or, without one, from the Strava API.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import NamedTuple
+from config import HEIGHT, WIDTH
+from data import dashboard_data_as_of, local_time
+from efforts import BestEffortIndex, load_efforts
+from render import Renderer, render_dashboard
+
+VIEW_NAMES = ("main", "trends", "history", "records")
+
+
+class Activity(NamedTuple):
+    id: int
+    name: str
+    distance: float
+    moving_time: int
+    start_date: datetime
+    start_date_local: datetime
+    average_cadence: float | None
+    average_heartrate: float | None
+    map: None = None
+
+
+class Job(NamedTuple):
+    as_of: datetime
+    width: int
+    height: int
+    out_dir: Path
+    views: tuple[int, ...]
+
+
+# Set once per worker process by _init_worker and shared by all of its jobs
+_history: list[Activity] = []
+_efforts: BestEffortIndex | None = None
+
+
+def slim(activity) -> Activity:
+    return Activity(
+        id=activity.id,
+        name=activity.name or "",
+        distance=float(activity.distance or 0),
+        moving_time=int(activity.moving_time or 0),
+        start_date=activity.start_date,
+        start_date_local=activity.start_date_local,
+        average_cadence=activity.average_cadence,
+        average_heartrate=activity.average_heartrate,
+    )
+
+
+def load_history(export: str | None) -> list[Activity]:
+    if export:
+        from importer import read_activities
+
+        with zipfile.ZipFile(export) as archive:
+            history = [slim(a) for a in read_activities(archive)]
+    else:
+        from data import get_all_activities, import_api_modules
+
+        import_api_modules()
+        history = [slim(a) for a in get_all_activities()]
+    history.sort(key=local_time)
+    return history
+
+
+def moments(start: datetime, end: datetime, every: str) -> list[datetime]:
+    points = []
+    if every == "week":
+        day = start + timedelta(days=6 - start.weekday())
+        while day <= end:
+            points.append(day.replace(hour=23, minute=59, second=59))
+            day += timedelta(weeks=1)
+    else:
+        year, month = start.year, start.month
+        while True:
+            next_month = datetime(year + month // 12, month % 12 + 1, 1)
+            moment = next_month - timedelta(seconds=1)
+            if moment > end:
+                break
+            points.append(moment)
+            year, month = next_month.year, next_month.month
+    return points
+
+
+def _init_worker(
+    history: list[Activity], efforts: BestEffortIndex, width: int, height: int
+) -> None:
+    global _history, _efforts
+    _history = history
+    _efforts = efforts
+    # Load this size's fonts once; load_font keeps them for every later job
+    Renderer(width, height)
+
+
+def _render_job(job: Job) -> list[Path]:
+    data = dashboard_data_as_of(_history, job.as_of, _efforts)
+    frames = render_dashboard(job.width, job.height, data, as_of=job.as_of)
+    paths = []
+    for view in job.views:
+        path = job.out_dir / f"{job.as_of:%Y-%m-%d}_{VIEW_NAMES[view]}.png"
+        frames[view].save(path)
+        paths.append(path)
+    return paths
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Render the dashboard at the end of each past week or month."
+    )
+    parser.add_argument("--year", type=int, default=datetime.now().year - 1)
+    parser.add_argument("--every", choices=("week", "month"), default="week")
+    parser.add_argument("--out", default="review", help="output directory")
+    parser.add_argument("--export", help="read history from a bulk export zip")
+    parser.add_argument("--width", type=int, default=WIDTH)
+    parser.add_argument("--height", type=int, default=HEIGHT)
+    parser.add_argument(
+        "--views",
+        default="main",
+        help=f"comma-separated views to save: {', '.join(VIEW_NAMES)}",
+    )
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    try:
+        views = tuple(VIEW_NAMES.index(v.strip()) for v in args.views.split(","))
+    except ValueError:
+        parser.error(f"--views must be drawn from {', '.join(VIEW_NAMES)}")
+
+    out_dir = Path(args.out)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    history = load_history(args.export)
+    efforts = load_efforts()
+    start = datetime(args.year, 1, 1)
+    end = datetime(args.year, 12, 31, 23, 59, 59)
+    jobs = [
+        Job(as_of, args.width, args.height, out_dir, views)
+        for as_of in moments(start, end, args.every)
+    ]
+
+    written = 0
+    with ProcessPoolExecutor(
+        max_workers=max(1, args.workers),
+        initializer=_init_worker,
+        initargs=(history, efforts, args.width, args.height),
+    ) as pool:
+        for paths in pool.map(_render_job, jobs, chunksize=4):
+            written += len(paths)
+    print(f"Wrote {written} frames to {out_dir}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
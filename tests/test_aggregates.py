@@ -0,0 +1,88 @@
+import pickle
+from datetime import datetime
+
+import pytest
+
+from aggregates import YearlyAggregates
+from data import local_time, parse_yearly_data
+
+# The last full year of the synthetic history
+AS_OF = datetime(datetime.now().year - 1, 12, 31, 23, 59, 59)
+
+
+@pytest.fixture(scope="module")
+def year(history) -> list:
+    return [a for a in history if local_time(a).year == AS_OF.year]
+
+
+def reconciled(activities: list) -> YearlyAggregates:
+    aggregates = YearlyAggregates(AS_OF.year)
+    aggregates.reconcile(activities)
+    return aggregates
+
+
+def assert_same(aggregates: YearlyAggregates, activities: list) -> None:
+    expected = parse_yearly_data(activities, AS_OF)
+    for summary in (aggregates.summary(AS_OF), reconciled(activities).summary(AS_OF)):
+        assert len(summary) == len(expected)
+        for value, want in zip(summary, expected):
+            assert value == pytest.approx(want, abs=0.01)
+
+
+def test_apply_then_reconcile_matches_a_full_recompute(year):
+    half = year[: len(year) // 2]
+    aggregates = YearlyAggregates(AS_OF.year)
+    for activity in half:
+        aggregates.apply(activity)
+    assert_same(aggregates, half)
+
+    aggregates.reconcile(year)
+    assert_same(aggregates, year)
+
+
+def test_reconcile_after_deletions(year):
+    aggregates = reconciled(year)
+    kept = [a for i, a in enumerate(year) if i % 5]
+    aggregates.reconcile(kept)
+    assert len(aggregates.records) == len(kept)
+    assert_same(aggregates, kept)
+
+
+def test_update_after_an_edit(year):
+    aggregates = reconciled(year)
+    edited = list(year)
+    edited[10] = edited[10].model_copy(update={"distance": edited[10].distance * 2})
+    edited[20] = edited[20].model_copy(update={"average_heartrate": None})
+    aggregates.update(edited[10])
+    aggregates.update(edited[20])
+    assert_same(aggregates, edited)
+
+
+def test_apply_is_idempotent(year):
+    aggregates = reconciled(year)
+    for activity in year[:50]:
+        aggregates.apply(activity)
+    assert_same(aggregates, year)
+
+
+def test_remove_everything_leaves_empty_totals(year):
+    aggregates = reconciled(year)
+    aggregates.reconcile([])
+    assert aggregates.summary(AS_OF) == parse_yearly_data([], AS_OF)
+    assert not aggregates.weekly_miles
+    assert aggregates.latest_start is None
+
+
+def test_survives_a_pickle_round_trip(year):
+    aggregates = pickle.loads(pickle.dumps(reconciled(year[:100])))
+    for activity in year[100:]:
+        aggregates.apply(activity)
+    assert_same(aggregates, year)
+
+
+def test_weekly_average_on_new_years_eve(year):
+    total_activities, total_miles, avg_weekly_miles, *_ = reconciled(year).summary(
+        AS_OF
+    )
+    assert total_activities == len(year)
+    assert avg_weekly_miles == pytest.approx(total_miles / 53, abs=0.01)
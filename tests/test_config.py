@@ -0,0 +1,62 @@
+import os
+from pathlib import Path
+
+import pytest
+
+import config
+
+CONFIG_PATH = Path(os.environ["STRAVA_FRAME_CONFIG"])
+DEFAULT_CONFIG = CONFIG_PATH.read_text()
+
+
+@pytest.fixture(autouse=True)
+def restore_config():
+    yield
+    CONFIG_PATH.write_text(DEFAULT_CONFIG)
+    config.reload()
+
+
+def save(**replacements: str) -> None:
+    text = DEFAULT_CONFIG
+    for old, new in replacements.items():
+        text = text.replace(f"{old} = ", f"{old} = {new}  # ")
+    CONFIG_PATH.write_text(text)
+
+
+def test_reload_rebinds_live_settings(capsys):
+    save(dark_mode="true")
+    assert config.reload() == {"DARK_MODE"}
+    assert config.DARK_MODE is True
+
+
+def test_restart_only_change_is_announced_once(capsys):
+    save(width="1024")
+    assert config.reload() == set()
+    assert config.WIDTH == 800
+    assert capsys.readouterr().err.count("WIDTH changes on the next restart") == 1
+
+    save(width="1024", dark_mode="true")
+    assert config.reload() == {"DARK_MODE"}
+    assert "WIDTH" not in capsys.readouterr().err
+
+    save(width="640")
+    config.reload()
+    assert "WIDTH changes on the next restart" in capsys.readouterr().err
+
+
+def test_reverted_restart_change_is_announced_again(capsys):
+    save(width="1024")
+    config.reload()
+    CONFIG_PATH.write_text(DEFAULT_CONFIG)
+    config.reload()
+    capsys.readouterr()
+
+    save(width="1024")
+    config.reload()
+    assert "WIDTH changes on the next restart" in capsys.readouterr().err
+
+
+def test_invalid_file_keeps_every_setting(capsys):
+    save(dark_mode='"maybe"')
+    assert config.reload() is None
+    assert config.DARK_MODE is False
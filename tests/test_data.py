@@ -0,0 +1,145 @@
+import math
+import pickle
+from concurrent.futures import wait
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import cache
+import data
+from data import dashboard_data_as_of
+from efforts import BestEffortIndex
+from history import HistoryRollups
+
+
+@pytest.fixture
+def listings(monkeypatch, tmp_path, history) -> list:
+    # The after= of every listing requested, serving the synthetic history
+    requested = []
+
+    def get_activity_page(page, after=None, per_page=data.ACTIVITIES_PER_PAGE):
+        if page == 1 and per_page != 1:
+            requested.append(after)
+        listed = [
+            a
+            for a in reversed(history)
+            if after is None or a.start_date > after.replace(tzinfo=timezone.utc)
+        ]
+        return listed[(page - 1) * per_page : page * per_page]
+
+    monkeypatch.setattr(cache, "CACHE_DIR", tmp_path)
+    monkeypatch.setattr(data, "get_activity_page", get_activity_page)
+    monkeypatch.setattr(data, "get_strava_client", lambda: None)
+    monkeypatch.setattr(data, "get_pr", lambda activity: None)
+    for name in ("aggregates", "rollups"):
+        monkeypatch.setattr(data, name, None)
+    monkeypatch.setattr(data, "best_efforts", BestEffortIndex())
+    monkeypatch.setattr(data, "newest_activity_id", False)
+    monkeypatch.setattr(data, "latest_activity_cache", {})
+    for name, source in data.DATA_SOURCES.items():
+        monkeypatch.setitem(data.DATA_SOURCES, name, data.DataSource(name, source.ttl))
+    return requested
+
+
+def imported(history, days_ago: int) -> datetime:
+    rollups = HistoryRollups()
+    for activity in history:
+        rollups.apply(activity)
+    rollups.reconciled_at = datetime.now() - timedelta(days=days_ago)
+    rollups.save()
+    return rollups.reconciled_at
+
+
+def test_first_refresh_lists_the_whole_history(listings, history):
+    data.refresh_activities()
+    assert None in listings
+    assert len(data.rollups.activities) == len(history)
+
+
+def test_imported_history_is_only_relisted_from_before_the_import(
+    listings, history
+):
+    reconciled_at = imported(history, days_ago=8)
+    data.refresh_activities()
+
+    since = (reconciled_at - data.HISTORY_OVERLAP).date()
+    assert None not in listings
+    assert datetime.combine(since, datetime.min.time()) - timedelta(days=1) in listings
+    assert len(data.rollups.activities) == len(history)
+
+
+def test_imported_history_is_kept_until_its_ttl(listings, history):
+    imported(history, days_ago=1)
+    data.refresh_activities()
+    assert listings == [datetime(datetime.now().year, 1, 1)]
+
+
+def test_forced_refresh_relists_the_whole_history(listings, history):
+    imported(history, days_ago=1)
+    data.refresh_activities(force=True)
+    assert None in listings
+
+
+def test_snapshot_data_pickles_without_pydantic(history):
+    # The startup snapshot is loaded before the Strava stack is imported
+    dashboard = dashboard_data_as_of(history, datetime.now())
+    assert b"pydantic" not in pickle.dumps(dashboard)
+
+
+@pytest.fixture
+def pages(monkeypatch, history) -> list:
+    # Every page number requested, newest activities first like the API
+    requested = []
+
+    def get_activity_page(page, after=None, per_page=data.ACTIVITIES_PER_PAGE):
+        requested.append(page)
+        newest_first = history[::-1]
+        return newest_first[(page - 1) * per_page : page * per_page]
+
+    monkeypatch.setattr(data, "get_activity_page", get_activity_page)
+    return requested
+
+
+@pytest.mark.parametrize("wave", [1, 2, 4])
+def test_paged_activities_requests_waves_until_a_short_page(pages, history, wave):
+    assert data.PagedActivities(wave=wave).result() == history[::-1]
+    # The last page is short; the rest of its wave was already in flight
+    last = len(history) // data.ACTIVITIES_PER_PAGE + 1
+    assert sorted(pages) == list(range(1, math.ceil(last / wave) * wave + 1))
+
+
+def test_paged_activities_submits_its_first_wave_at_once(pages):
+    wait(data.PagedActivities(wave=2).futures)
+    assert sorted(pages) == [1, 2]
+
+
+@pytest.mark.parametrize(
+    "ttl, age, stale",
+    [
+        (timedelta(hours=6), timedelta(hours=5), False),
+        (timedelta(hours=6), timedelta(hours=6), True),
+        (None, timedelta(days=365), False),
+    ],
+)
+def test_data_source_goes_stale_after_its_ttl(ttl, age, stale):
+    now = datetime(2024, 6, 1, 12)
+    source = data.DataSource("test", ttl)
+    assert source.is_stale(now)
+    source.mark_fresh(now - age)
+    assert source.is_stale(now) is stale
+
+
+def test_invalidated_data_source_is_stale_within_its_ttl():
+    now = datetime(2024, 6, 1, 12)
+    source = data.DataSource("test", None)
+    source.mark_fresh(now)
+    source.invalidate()
+    assert source.is_stale(now)
+
+
+def test_refresh_without_a_new_activity_only_probes(listings):
+    data.refresh_activities()
+    listings.clear()
+    data.refresh_activities()
+    assert listings == []
+    assert not any(s.is_stale(datetime.now()) for s in data.DATA_SOURCES.values())
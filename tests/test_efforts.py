@@ -0,0 +1,74 @@
+from datetime import date, datetime
+from types import SimpleNamespace
+
+from data import dashboard_data_as_of
+from efforts import BestEffortIndex
+from timetravel import Activity
+
+
+def run(activity_id: int, day: date) -> Activity:
+    start = datetime(day.year, day.month, day.day, 7)
+    return Activity(
+        activity_id, f"Run {activity_id}", 10000.0, 3000, start, start, None, None
+    )
+
+
+def effort(name: str, seconds: int, pr_rank: int | None = 1) -> SimpleNamespace:
+    return SimpleNamespace(
+        name=name, distance=None, elapsed_time=seconds, pr_rank=pr_rank
+    )
+
+
+# (activity id, day, best efforts), oldest first
+RUNS = [
+    (1, date(2021, 5, 1), [effort("5K", 1500), effort("10K", 3200)]),
+    (2, date(2022, 2, 10), [effort("5K", 1450)]),
+    (3, date(2022, 2, 20), [effort("10K", 3300, pr_rank=None)]),
+    (4, date(2022, 6, 1), [effort("5K", 1400), effort("10K", 3000)]),
+    (5, date(2023, 1, 5), [effort("1K", 250)]),
+]
+
+
+def index() -> BestEffortIndex:
+    efforts = BestEffortIndex()
+    for activity_id, day, bests in RUNS:
+        efforts.record(activity_id, day, bests)
+    return efforts
+
+
+def test_summary_today_sees_every_pr():
+    summary = index().summary(date(2023, 12, 31))
+    assert summary["pr_count"] == 6
+    assert summary["pr_count_this_year"] == 1
+    assert summary["latest"]["activity_id"] == 5
+    assert {e["name"]: e["seconds"] for e in summary["bests"]} == {
+        "1K": 250,
+        "5K": 1400,
+        "10K": 3000,
+    }
+
+
+def test_frame_in_the_past_has_no_later_pr():
+    as_of = datetime(2022, 3, 1)
+    history = [run(activity_id, day) for activity_id, day, _ in RUNS]
+    records = dashboard_data_as_of(history, as_of, index())[-1]
+
+    efforts = records["bests"] + [records["latest"]]
+    assert all(e["date"] <= as_of.date() for e in efforts)
+    assert records["pr_count"] == 3
+    assert records["pr_count_this_year"] == 1
+    assert records["latest"]["activity_id"] == 2
+    assert {e["name"]: e["seconds"] for e in records["bests"]} == {
+        "5K": 1450,
+        "10K": 3200,
+    }
+
+
+def test_summary_before_any_pr_is_empty():
+    summary = index().summary(date(2020, 1, 1))
+    assert summary == {
+        "bests": [],
+        "pr_count": 0,
+        "pr_count_this_year": 0,
+        "latest": None,
+    }
@@ -0,0 +1,110 @@
+import multiprocessing
+
+import pytest
+from PIL import Image
+
+from framebuffer import FrameBuffer
+
+SIZES = ((32, 24), (320, 240), (64, 48))
+VIEWS = 4
+
+
+def write_frames(path: str, mode: str, size: tuple[int, int], value: int) -> None:
+    FrameBuffer(path).write([Image.new(mode, size, value) for _ in range(VIEWS)])
+
+
+def write_until(path: str, stop, count) -> None:
+    # Each write fills every view with one value and alternates between sizes,
+    # so the file grows while the reader is mapping it
+    buffer = FrameBuffer(path)
+    value = 0
+    while not stop.is_set():
+        value = value % 250 + 1
+        size = SIZES[value % len(SIZES)]
+        buffer.write([Image.new("L", size, value) for _ in range(VIEWS)])
+        count.value += 1
+
+
+def in_process(target, *args) -> None:
+    process = multiprocessing.get_context("spawn").Process(target=target, args=args)
+    process.start()
+    process.join()
+    assert process.exitcode == 0
+
+
+@pytest.fixture
+def path(tmp_path) -> str:
+    return str(tmp_path / "frames.buf")
+
+
+@pytest.mark.parametrize("mode", ["RGB", "P", "L", "1"])
+def test_frames_written_by_another_process_read_back(path, mode):
+    value = {"RGB": (10, 20, 30), "P": 5, "L": 200, "1": 1}[mode]
+    in_process(write_frames, path, mode, (40, 30), value)
+
+    seq, frames = FrameBuffer(path).read()
+    assert seq == 2
+    assert len(frames) == VIEWS
+    expected = Image.new(mode, (40, 30), value)
+    for frame in frames:
+        assert frame.size == (40, 30)
+        assert frame.convert(mode).tobytes() == expected.tobytes()
+
+
+def test_read_follows_a_resize_while_old_frames_are_alive(path):
+    reader = FrameBuffer(path)
+    in_process(write_frames, path, "L", (40, 30), 1)
+    _, small = reader.read()
+
+    in_process(write_frames, path, "L", (400, 300), 2)
+    seq, large = reader.read()
+    assert seq == 4
+    assert large[0].size == (400, 300)
+    assert large[0].getpixel((399, 299)) == 2
+    # The old map stays valid for frames that are still held
+    assert small[0].getpixel((0, 0)) == 1
+
+    del small, large
+    in_process(write_frames, path, "L", (800, 600), 3)
+    _, frames = reader.read()
+    assert frames[0].getpixel((799, 599)) == 3
+
+
+def test_nothing_is_read_while_a_write_is_underway(path):
+    in_process(write_frames, path, "L", (40, 30), 1)
+    buffer = FrameBuffer(path)
+    buffer.header.seq += 1
+    assert buffer.read() == (3, [])
+    # A writer that died mid-write is recovered by the next write
+    buffer.write([Image.new("L", (40, 30), 2)])
+    seq, frames = buffer.read()
+    assert seq == 4
+    assert frames[0].getpixel((0, 0)) == 2
+
+
+def test_reads_with_an_unchanged_seq_are_never_torn(path):
+    context = multiprocessing.get_context("spawn")
+    stop = context.Event()
+    count = context.Value("i", 0)
+    writer = context.Process(target=write_until, args=(path, stop, count))
+    writer.start()
+    reader = FrameBuffer(path)
+    consistent = 0
+    try:
+        while consistent < 200:
+            seq, frames = reader.read()
+            if not frames:
+                continue
+            pixels = [frame.tobytes() for frame in frames]
+            if reader.seq != seq:
+                # Torn by a write that started meanwhile; read again
+                continue
+            assert len(set(pixels)) == 1
+            assert len(set(pixels[0])) == 1
+            consistent += 1
+            del frames
+    finally:
+        stop.set()
+        writer.join()
+    assert writer.exitcode == 0
+    assert count.value > 1
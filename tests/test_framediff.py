@@ -0,0 +1,68 @@
+import pytest
+from PIL import Image
+
+from framediff import diff_frames, dirty_area
+
+
+def changed(size, pixels, mode="RGB"):
+    """(previous, current) frames of size differing at each of pixels."""
+    previous = Image.new(mode, size, 1)
+    current = previous.copy()
+    for xy in pixels:
+        current.putpixel(xy, 0)
+    return previous, current
+
+
+@pytest.mark.parametrize(
+    "size, pixels, expected",
+    [
+        ((100, 70), [], []),
+        ((100, 70), [(0, 0)], [(0, 0, 32, 32)]),
+        ((100, 70), [(31, 31), (32, 31)], [(0, 0, 64, 32)]),
+        ((100, 70), [(5, 5), (5, 40)], [(0, 0, 32, 64)]),
+        ((100, 70), [(5, 5), (70, 5)], [(0, 0, 32, 32), (64, 0, 96, 32)]),
+        # The last tile in each direction is cut off at the frame's edge
+        ((100, 70), [(99, 69)], [(96, 64, 100, 70)]),
+        ((100, 70), [(0, 69), (99, 69)], [(0, 64, 32, 70), (96, 64, 100, 70)]),
+        ((32, 32), [(31, 31)], [(0, 0, 32, 32)]),
+    ],
+)
+@pytest.mark.parametrize("mode", ["RGB", "L", "P", "1"])
+def test_dirty_tiles(size, pixels, expected, mode):
+    previous, current = changed(size, pixels, mode)
+    assert diff_frames(previous, current) == expected
+
+
+@pytest.mark.parametrize(
+    "previous",
+    [
+        None,
+        Image.new("RGB", (100, 60), "white"),
+        Image.new("L", (100, 70), "white"),
+    ],
+    ids=["no previous frame", "size mismatch", "mode mismatch"],
+)
+def test_whole_frame_dirty(previous):
+    current = Image.new("RGB", (100, 70), "white")
+    assert diff_frames(previous, current) == [(0, 0, 100, 70)]
+
+
+def test_palette_change_is_whole_frame_dirty():
+    previous = Image.new("P", (100, 70), 1)
+    previous.putpalette([255, 0, 0, 0, 255, 0])
+    current = previous.copy()
+    current.putpalette([0, 255, 0, 255, 0, 0])
+    assert diff_frames(previous, current) == [(0, 0, 100, 70)]
+
+
+def test_tile_size():
+    previous, current = changed((100, 70), [(15, 15)])
+    assert diff_frames(previous, current, tile_size=16) == [(0, 0, 16, 16)]
+
+
+@pytest.mark.parametrize(
+    "rects, area",
+    [([], 0), ([(0, 0, 32, 32)], 1024), ([(0, 0, 10, 10), (96, 64, 100, 70)], 124)],
+)
+def test_dirty_area(rects, area):
+    assert dirty_area(rects) == area
@@ -0,0 +1,51 @@
+from datetime import date, datetime
+from types import SimpleNamespace
+
+import pytest
+
+from aggregates import METERS_PER_MILE
+from history import HistoryRollups
+
+# A Wednesday
+TODAY = date(2024, 6, 12)
+
+
+def run(activity_id: int, day: date, miles: float) -> SimpleNamespace:
+    start = datetime(day.year, day.month, day.day, 7)
+    return SimpleNamespace(
+        id=activity_id, start_date_local=start, distance=miles * METERS_PER_MILE
+    )
+
+
+def rollups(*runs) -> HistoryRollups:
+    rollups = HistoryRollups()
+    for activity in runs:
+        rollups.apply(activity)
+    return rollups
+
+
+@pytest.mark.parametrize("weeks", [1, 2, 52])
+def test_calendar_starts_on_a_monday_and_ends_today(weeks):
+    start, daily = rollups().calendar(TODAY, weeks)
+    assert start.weekday() == 0
+    assert len(daily) == 7 * (weeks - 1) + TODAY.weekday() + 1
+    assert daily == [0.0] * len(daily)
+
+
+def test_calendar_indexes_days_from_its_start():
+    start, daily = rollups(
+        run(1, date(2024, 6, 3), 3.0),
+        run(2, date(2024, 6, 3), 2.0),
+        run(3, TODAY, 6.0),
+        # Outside the calendar, before and after it
+        run(4, date(2024, 5, 31), 9.0),
+        run(5, date(2024, 6, 13), 9.0),
+    ).calendar(TODAY, weeks=2)
+    assert start == date(2024, 6, 3)
+    assert daily == pytest.approx([5.0, 0, 0, 0, 0, 0, 0, 0, 0, 6.0])
+
+
+def test_calendar_drops_a_removed_activity():
+    history = rollups(run(1, TODAY, 4.0), run(2, TODAY, 1.0))
+    history.remove(1)
+    assert history.calendar(TODAY, weeks=1)[1][-1] == pytest.approx(1.0)
@@ -0,0 +1,64 @@
+import sys
+import zipfile
+
+import pytest
+
+import cache
+import importer
+
+HEADER = "Activity ID,Activity Date,Activity Name,Activity Type,Elapsed Time,Distance"
+ROWS = [
+    '101,"Jan 5, 2024, 1:23:45 PM",Morning Run,Run,1800,5.2',
+    '102,"Feb 6, 2024, 7:00:00 AM",Long Run,Run,5400,16.1',
+    '103,"Mar 7, 2024, 6:30:00 PM",Treadmill,Virtual Run,2400,8.0',
+]
+
+
+def export(tmp_path, lines: list[str]) -> str:
+    path = tmp_path / "export_1.zip"
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr(importer.ACTIVITIES_CSV, "\n".join(lines) + "\n")
+    return str(path)
+
+
+def run_main(monkeypatch, archive: str) -> None:
+    monkeypatch.setattr(sys, "argv", ["importer.py", archive])
+    importer.main()
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "CACHE_DIR", tmp_path / "cache")
+
+
+def test_imports_every_row(tmp_path, monkeypatch, capsys, caplog):
+    run_main(monkeypatch, export(tmp_path, [HEADER, *ROWS]))
+    assert capsys.readouterr().out.startswith("Imported 3 activities")
+    # The export's activity types are display names stravalib would not accept
+    assert "activity type" not in caplog.text
+    assert (tmp_path / "cache" / "aggregates.pkl").exists()
+
+
+@pytest.mark.parametrize(
+    "lines, message",
+    [
+        (
+            [HEADER.replace("Activity ID,", ""), *(r.split(",", 1)[1] for r in ROWS)],
+            "no 'Activity ID' column",
+        ),
+        (
+            [HEADER.replace(",Activity Date", ""), "101,Morning Run,Run,1800,5.2"],
+            "no 'Activity Date' column",
+        ),
+        ([], "no 'Activity ID' column"),
+        ([HEADER, ROWS[0], "103"], "line 3 has no Activity ID or Activity Date"),
+        ([HEADER, 'abc,"Jan 5, 2024, 1:23:45 PM",Run,Run,1,1'], "invalid literal"),
+    ],
+    ids=["no id column", "no date column", "empty csv", "short row", "bad id"],
+)
+def test_malformed_export_is_reported(tmp_path, monkeypatch, capsys, lines, message):
+    with pytest.raises(SystemExit) as exit:
+        run_main(monkeypatch, export(tmp_path, lines))
+    assert exit.value.code == 1
+    assert message in capsys.readouterr().err
+    assert not (tmp_path / "cache").exists()
@@ -0,0 +1,258 @@
+import os
+import subprocess
+import sys
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from PIL import Image
+
+import cache
+import config
+import main
+from crashlog import RESTART_ENV
+
+
+class FakeRoot:
+    # Records after() timers instead of running a Tk event loop
+    def __init__(self):
+        self.timers = {}
+        self.next_id = 0
+
+    def after(self, ms, callback, *args):
+        self.next_id += 1
+        self.timers[self.next_id] = (ms, callback, args)
+        return self.next_id
+
+    def after_cancel(self, after_id):
+        del self.timers[after_id]
+
+    def delays(self) -> list[int]:
+        return [ms for ms, _, _ in self.timers.values()]
+
+    def fire(self):
+        after_id = min(self.timers)
+        _, callback, args = self.timers.pop(after_id)
+        callback(*args)
+
+
+@pytest.fixture
+def root(monkeypatch) -> FakeRoot:
+    root = FakeRoot()
+    monkeypatch.setattr(main, "tk_root", root)
+    return root
+
+
+@pytest.fixture
+def scheduler(root):
+    runs = []
+    return main.RefreshScheduler(root, 1000, lambda: runs.append(1)), runs
+
+
+def test_requests_coalesce_into_one_timer(root, scheduler):
+    scheduler, runs = scheduler
+    scheduler.request(500)
+    scheduler.request(0)
+    assert root.delays() == [0]
+    root.fire()
+    assert runs == [1]
+
+
+def test_request_during_a_refresh_runs_once_after_it(root, scheduler):
+    scheduler, runs = scheduler
+    scheduler.request()
+    root.fire()
+    scheduler.request()
+    scheduler.request()
+    assert root.timers == {}
+
+    scheduler.finish()
+    assert root.delays() == [0]
+    root.fire()
+    scheduler.finish()
+    assert root.delays() == [1000]
+    assert runs == [1, 1]
+
+
+def test_finish_after_a_delay(root, scheduler):
+    scheduler, _ = scheduler
+    scheduler.request()
+    root.fire()
+    scheduler.finish(30000)
+    assert root.delays() == [30000]
+
+
+def test_set_interval_rearms_a_pending_timer(root, scheduler):
+    scheduler, _ = scheduler
+    scheduler.set_interval(2000)
+    assert root.timers == {}
+
+    scheduler.request(500)
+    scheduler.set_interval(3000)
+    assert root.delays() == [3000]
+
+
+@pytest.fixture
+def renders(monkeypatch) -> list:
+    # The size of every render_dashboard call; frames are (size, buffers)
+    sizes = []
+
+    def render_dashboard(width, height, data, buffers=None):
+        sizes.append((width, height))
+        return ((width, height), buffers)
+
+    monkeypatch.setattr(main, "render_dashboard", render_dashboard)
+    monkeypatch.setattr(main, "render_cache", {})
+    monkeypatch.setattr(main, "spare_frames", None)
+    return sizes
+
+
+def configure(root, width: int, height: int, widget=None):
+    event = SimpleNamespace(widget=widget or root, width=width, height=height)
+    main.on_configure(event)
+
+
+def test_configure_events_are_debounced(root, monkeypatch):
+    monkeypatch.setattr(main, "resize_after_id", None)
+    for width in (801, 802, 803):
+        configure(root, width, 480)
+    assert list(root.timers.values()) == [
+        (main.RESIZE_DEBOUNCE_MS, main.on_resize_settled, ())
+    ]
+
+
+@pytest.mark.parametrize(
+    "size, widget",
+    [((main.current_width, main.current_height), None), ((640, 480), object())],
+    ids=["same size", "child widget"],
+)
+def test_configure_events_that_change_nothing_are_ignored(root, size, widget):
+    configure(root, *size, widget)
+    assert root.timers == {}
+
+
+def test_render_frames_reuses_a_resolution_already_rendered(renders):
+    assert main.render_frames(800, 480) is main.render_frames(800, 480)
+    assert renders == [(800, 480)]
+
+
+def test_render_frames_keeps_the_newest_resolutions(renders):
+    sizes = [(800 + i, 480) for i in range(main.MAX_CACHED_RESOLUTIONS + 1)]
+    for size in sizes:
+        main.render_frames(*size)
+    assert list(main.render_cache) == sizes[1:]
+
+    main.render_frames(*sizes[0])
+    assert renders == sizes + sizes[:1]
+
+
+
+def test_importing_the_dashboard_leaves_the_strava_stack_unloaded():
+    # The persisted frame goes up before anything slow is imported
+    script = "import sys, main; print(sorted(set(sys.modules) & set(sys.argv[1:])))"
+    heavy = ["stravalib", "pydantic", "pydantic_core", "tenacity", "requests"]
+    result = subprocess.run(
+        [sys.executable, "-c", script, *heavy],
+        cwd=os.path.dirname(main.__file__),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.strip() == "[]"
+
+
+@pytest.fixture
+def snapshot_state(monkeypatch, tmp_path):
+    monkeypatch.setattr(cache, "CACHE_DIR", tmp_path)
+    monkeypatch.delenv(RESTART_ENV, raising=False)
+    for name, value in (
+        ("render_cache", {}),
+        ("dashboard_data", None),
+        ("fetched_at", None),
+    ):
+        monkeypatch.setattr(main, name, value)
+
+
+def test_restore_snapshot_seeds_the_render_cache(snapshot_state):
+    frames = [Image.new("RGB", (80, 48), color) for color in ("red", "blue")]
+    fetched_at = datetime.now() - timedelta(minutes=1)
+    cache.save_snapshot(("data",), fetched_at, frames)
+
+    assert main.restore_snapshot() == 0
+    assert main.dashboard_data == ("data",)
+    assert main.fetched_at == fetched_at
+    restored = main.render_cache[(80, 48)]
+    assert [f.getpixel((0, 0)) for f in restored] == [(255, 0, 0), (0, 0, 255)]
+
+
+def test_budget_mode_keeps_one_resolution_and_draws_over_spare_frames(
+    renders, monkeypatch
+):
+    monkeypatch.setattr(main, "MEMORY_BUDGET_MB", 64)
+    main.render_frames(800, 480)
+    main.spare_frames = spare = ("old frames",)
+    frames = main.render_frames(640, 480)
+    assert list(main.render_cache) == [(640, 480)]
+    assert frames[1] is spare
+    assert main.spare_frames is None
+
+
+class FakeLabel:
+    def __init__(self):
+        self.image = None
+
+    def config(self, image):
+        self.image = image
+
+
+@pytest.fixture
+def views(monkeypatch, root) -> FakeLabel:
+    label = FakeLabel()
+    monkeypatch.setattr(main, "tk_label", label)
+    monkeypatch.setattr(main, "tk_photos", ["main", "trends", "history", "records"])
+    monkeypatch.setattr(main, "view_index", 0)
+    monkeypatch.setattr(main, "rotate_after_id", None)
+    monkeypatch.setattr(config, "ROTATE_SECONDS", 30)
+    return label
+
+
+def test_rotation_cycles_through_the_prebuilt_views(views, root):
+    main.schedule_rotation()
+    shown = []
+    for _ in range(5):
+        assert root.delays() == [30000]
+        root.fire()
+        shown.append(views.image)
+    assert shown == ["trends", "history", "records", "main", "trends"]
+
+
+def test_tap_gives_the_chosen_view_a_full_turn(views, root):
+    main.schedule_rotation()
+    main.toggle_advanced_view()
+    assert views.image == "trends"
+    assert root.delays() == [30000]
+
+
+def test_no_rotation_when_disabled(views, root, monkeypatch):
+    main.schedule_rotation()
+    monkeypatch.setattr(config, "ROTATE_SECONDS", 0)
+    main.schedule_rotation()
+    assert root.timers == {}
+
+
+@pytest.mark.parametrize(
+    "minutes_old, waits", [(5, True), (20, False)], ids=["fresh", "due"]
+)
+def test_warm_restart_waits_out_a_fresh_snapshot(
+    snapshot_state, monkeypatch, minutes_old, waits
+):
+    monkeypatch.setenv(RESTART_ENV, "1")
+    fetched_at = datetime.now() - timedelta(minutes=minutes_old)
+    cache.save_snapshot(("data",), fetched_at, [Image.new("RGB", (8, 8))])
+
+    delay = main.restore_snapshot()
+    remaining = config.REFRESH_TIME - minutes_old * 60 * 1000
+    if waits:
+        assert delay == pytest.approx(remaining, abs=1000)
+    else:
+        assert delay == 0
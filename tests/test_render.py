@@ -0,0 +1,72 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pytest
+from PIL import Image
+
+import config
+from data import dashboard_data_as_of
+from render import (
+    ASSETS_DIR,
+    Renderer,
+    colorize_icon,
+    render_dashboard,
+    tinted_icon,
+)
+
+
+@pytest.fixture(scope="module")
+def dashboard(history):
+    return dashboard_data_as_of(history, datetime.now())
+
+
+def test_tinted_icon_is_built_once_per_size_and_color():
+    icon = tinted_icon("fire.png", 40, "#FC4C02")
+    assert icon.height == 40
+    assert tinted_icon("fire.png", 40, "#FC4C02") is icon
+    assert tinted_icon("fire.png", 41, "#FC4C02") is not icon
+    assert tinted_icon("fire.png", 40, "#00FF00") is not icon
+
+
+def test_colorize_icon_paints_every_pixel_one_color():
+    with Image.open(os.path.join(ASSETS_DIR, "fire.png")) as raw:
+        icon = colorize_icon(raw, "#FC4C02")
+    colors = {rgba[:3] for _, rgba in icon.getcolors(icon.width * icon.height)}
+    assert colors == {(0xFC, 0x4C, 0x02)}
+
+
+def test_render_draws_over_buffers_of_the_same_size(dashboard):
+    frames = render_dashboard(320, 240, dashboard)
+    pixels = [frame.tobytes() for frame in frames]
+    redrawn = render_dashboard(320, 240, dashboard, frames)
+    assert all(new is old for new, old in zip(redrawn, frames))
+    assert [frame.tobytes() for frame in redrawn] == pixels
+
+
+def test_render_ignores_buffers_of_another_size(dashboard):
+    frames = render_dashboard(320, 240, dashboard)
+    redrawn = render_dashboard(400, 240, dashboard, frames)
+    assert [frame.size for frame in redrawn] == [(400, 240)] * len(frames)
+
+
+def test_heatmap_replaces_the_monthly_bars(dashboard, monkeypatch):
+    bars = render_dashboard(400, 240, dashboard)[0]
+    monkeypatch.setattr(config, "MONTHLY_CHART", "heatmap")
+    heatmap = render_dashboard(400, 240, dashboard)[0]
+    palette = Renderer(400, 240)._heatmap_palette()
+    shades = {tuple(palette[i : i + 3]) for i in range(0, len(palette), 3)}
+    colors = {rgb for _, rgb in heatmap.getcolors(heatmap.width * heatmap.height)}
+    # Rest days and every accent shade, given a history with easy and long runs
+    assert shades <= colors
+    assert heatmap.tobytes() != bars.tobytes()
+
+
+def test_concurrent_renders_match_a_serial_one(dashboard):
+    expected = [frame.tobytes() for frame in render_dashboard(320, 240, dashboard)]
+    with ThreadPoolExecutor(4) as pool:
+        renders = list(
+            pool.map(lambda _: render_dashboard(320, 240, dashboard), range(4))
+        )
+    for frames in renders:
+        assert [frame.tobytes() for frame in frames] == expected
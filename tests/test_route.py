@@ -0,0 +1,94 @@
+import pytest
+
+from route import decode_polyline, douglas_peucker, project, route_geometry
+
+# The worked example from Google's polyline format documentation
+GOOGLE_EXAMPLE = "_p~iF~ps|U_ulLnnqC_mqNvxq`@"
+
+
+def flat(points):
+    # pytest.approx compares flat sequences, not lists of pairs
+    return [coordinate for point in points for coordinate in point]
+
+
+@pytest.mark.parametrize(
+    "encoded, expected",
+    [
+        ("", []),
+        ("_p~iF~ps|U", [(38.5, -120.2)]),
+        (GOOGLE_EXAMPLE, [(38.5, -120.2), (40.7, -120.95), (43.252, -126.453)]),
+        ("??", [(0.0, 0.0)]),
+    ],
+)
+def test_decode_polyline(encoded, expected):
+    assert flat(decode_polyline(encoded)) == pytest.approx(flat(expected))
+
+
+def test_decode_polyline_drops_a_dangling_latitude():
+    assert decode_polyline("_p~iF") == []
+
+
+@pytest.mark.parametrize(
+    "points",
+    [
+        [(51.5, -0.12)],
+        [(-33.86, 151.2), (-33.87, 151.21), (-33.85, 151.19)],
+        [(0.00001 * i, -0.00002 * i) for i in range(200)],
+    ],
+)
+def test_decode_inverts_encode(points, encode_polyline):
+    decoded = decode_polyline(encode_polyline(points))
+    assert flat(decoded) == pytest.approx(flat(points), abs=1e-6)
+
+
+@pytest.mark.parametrize(
+    "points, tolerance, expected",
+    [
+        ([], 0.5, []),
+        ([(1.0, 1.0)], 0.5, [(1.0, 1.0)]),
+        ([(0.0, 0.0), (5.0, 5.0)], 0.5, [(0.0, 0.0), (5.0, 5.0)]),
+        (
+            [(0.0, 0.0), (1.0, 0.0), (2.0, 0.0), (3.0, 0.0)],
+            0.5,
+            [(0.0, 0.0), (3.0, 0.0)],
+        ),
+        ([(0.0, 0.0), (1.0, 0.4), (2.0, 0.0)], 0.5, [(0.0, 0.0), (2.0, 0.0)]),
+        (
+            [(0.0, 0.0), (1.0, 3.0), (2.0, 0.0)],
+            0.5,
+            [(0.0, 0.0), (1.0, 3.0), (2.0, 0.0)],
+        ),
+        # A closed loop: every point is measured from the shared endpoint
+        (
+            [(0.0, 0.0), (4.0, 0.0), (4.0, 4.0), (0.0, 0.0)],
+            0.5,
+            [(0.0, 0.0), (4.0, 0.0), (4.0, 4.0), (0.0, 0.0)],
+        ),
+    ],
+)
+def test_douglas_peucker(points, tolerance, expected):
+    assert douglas_peucker(points, tolerance) == expected
+
+
+@pytest.mark.parametrize(
+    "coords, expected",
+    [
+        ([], []),
+        ([(40.0, -74.0)], [(50.0, 25.0)]),
+        ([(40.0, -74.0), (40.0, -74.0)], [(50.0, 25.0), (50.0, 25.0)]),
+    ],
+)
+def test_project_degenerate_routes(coords, expected):
+    assert flat(project(coords, 100, 50)) == pytest.approx(flat(expected))
+
+
+def test_project_keeps_north_up_within_the_box():
+    points = project([(40.0, -74.0), (40.01, -74.0), (40.0, -73.99)], 100, 50, 5)
+    assert all(5 <= x <= 95 and 5 <= y <= 45 for x, y in points)
+    # The northern point is drawn above the southern one
+    assert points[1][1] < points[0][1]
+
+
+@pytest.mark.parametrize("polyline", ["", "_p~iF~ps|U"])
+def test_route_geometry_of_empty_or_one_point_routes(polyline):
+    assert len(route_geometry(1, polyline, (60, 40))) == len(decode_polyline(polyline))
@@ -0,0 +1,67 @@
+import pytest
+
+from series import downsample, lttb, rolling_average
+
+ZIGZAG = [(float(x), float(x % 7 - 3 * (x % 2))) for x in range(50)]
+
+
+@pytest.mark.parametrize("threshold", [0, 1, 2, 50, 51, 1000])
+def test_lttb_returns_the_input_when_it_cannot_or_need_not_reduce(threshold):
+    assert lttb(ZIGZAG, threshold) == ZIGZAG
+
+
+@pytest.mark.parametrize("points", [[], [(0.0, 1.0)], [(0.0, 1.0), (1.0, 2.0)]])
+@pytest.mark.parametrize("threshold", [0, 2, 3, 10])
+def test_lttb_short_input(points, threshold):
+    assert lttb(points, threshold) == points
+
+
+@pytest.mark.parametrize("threshold", [3, 4, 10, 25, 49])
+def test_lttb_keeps_threshold_points_in_order(threshold):
+    sampled = lttb(ZIGZAG, threshold)
+    assert len(sampled) == threshold
+    assert sampled[0] == ZIGZAG[0]
+    assert sampled[-1] == ZIGZAG[-1]
+    assert all(p in ZIGZAG for p in sampled)
+    assert [p[0] for p in sampled] == sorted(p[0] for p in sampled)
+
+
+def test_lttb_keeps_a_spike():
+    points = [(float(x), 0.0) for x in range(100)]
+    points[37] = (37.0, 50.0)
+    assert (37.0, 50.0) in lttb(points, 5)
+
+
+@pytest.mark.parametrize(
+    "data, window, expected",
+    [
+        ([], 3, []),
+        ([1.0, 2.0, 3.0], 0, [1.0, 2.0, 3.0]),
+        ([1.0, 2.0, 3.0], 1, [1.0, 2.0, 3.0]),
+        ([2.0, 4.0, 6.0, 8.0], 2, [2.0, 3.0, 5.0, 7.0]),
+        ([3.0, 6.0, 9.0, 12.0], 3, [3.0, 4.5, 6.0, 9.0]),
+        ([1.0, 2.0], 5, [1.0, 1.5]),
+    ],
+)
+def test_rolling_average(data, window, expected):
+    assert rolling_average(data, window) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize(
+    "data, max_points, smoothing, expected",
+    [
+        ([], 10, 0, []),
+        ([5.0], 10, 0, [(0, 5.0)]),
+        ([5.0, 7.0], 1, 0, [(0, 5.0), (1, 7.0)]),
+        ([2.0, 4.0, 6.0], 10, 2, [(0, 2.0), (1, 3.0), (2, 5.0)]),
+    ],
+)
+def test_downsample(data, max_points, smoothing, expected):
+    assert downsample(data, max_points, smoothing) == expected
+
+
+def test_downsample_indexes_the_original_series():
+    data = [float(x % 11) for x in range(300)]
+    points = downsample(data, 40)
+    assert len(points) == 40
+    assert all(data[int(x)] == y for x, y in points)
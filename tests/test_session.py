@@ -0,0 +1,35 @@
+import pytest
+from requests.adapters import HTTPAdapter
+
+import session
+from session import STRAVA_HOST, TimeoutHTTPAdapter, get_session
+
+
+@pytest.fixture(autouse=True)
+def fresh_session(monkeypatch):
+    monkeypatch.setattr(session, "_session", None)
+
+
+def test_every_call_shares_one_session():
+    assert get_session(20) is get_session(5)
+
+
+def test_strava_requests_go_through_one_bounded_pool():
+    adapter = get_session(20, pool_size=3).get_adapter(f"{STRAVA_HOST}/api/v3")
+    assert isinstance(adapter, TimeoutHTTPAdapter)
+    assert adapter._pool_maxsize == 3
+    assert adapter._pool_block
+
+
+@pytest.mark.parametrize("timeout, expected", [(None, 20), (5, 5)])
+def test_default_timeout_applies_only_when_none_is_set(
+    monkeypatch, timeout, expected
+):
+    sent = {}
+
+    def send(self, request, **kwargs):
+        sent.update(kwargs)
+
+    monkeypatch.setattr(HTTPAdapter, "send", send)
+    TimeoutHTTPAdapter(20).send(object(), timeout=timeout)
+    assert sent["timeout"] == expected
@@ -0,0 +1,74 @@
+import signal
+
+import pytest
+
+import supervisor
+from crashlog import RESTART_ENV
+
+
+@pytest.fixture
+def supervise(monkeypatch):
+    # Runs supervisor.main over scripted child exits; returns what it did
+    def run(*exits):
+        exits = list(exits)
+        restarts, delays, crashes = [], [], []
+
+        def run_child(restart):
+            restarts.append(restart)
+            return exits.pop(0)
+
+        monkeypatch.setattr(supervisor, "run_child", run_child)
+        monkeypatch.setattr(supervisor.time, "sleep", delays.append)
+        monkeypatch.setattr(supervisor, "record_crash", crashes.append)
+        supervisor.main()
+        assert exits == []
+        return restarts, delays, crashes
+
+    return run
+
+
+@pytest.mark.parametrize("code", [0, -signal.SIGTERM])
+def test_a_clean_exit_stops_the_supervisor(supervise, code):
+    assert supervise((code, 5.0, "")) == ([0], [], [])
+
+
+def test_backoff_doubles_while_the_child_keeps_crashing(supervise):
+    restarts, delays, crashes = supervise(
+        (1, 2.0, ""), (1, 2.0, ""), (1, 2.0, ""), (0, 2.0, "")
+    )
+    assert restarts == [0, 1, 2, 3]
+    assert delays == [5, 10, 20]
+    assert len(crashes) == 3
+
+
+def test_a_stable_run_resets_the_backoff(supervise):
+    stable = supervisor.STABLE_SECONDS
+    _, delays, _ = supervise(
+        (1, 2.0, ""), (1, 2.0, ""), (1, stable, ""), (0, 2.0, "")
+    )
+    assert delays == [5, 10, 5]
+
+
+def test_a_killed_child_is_logged_with_its_stderr(supervise):
+    _, _, crashes = supervise((-signal.SIGKILL, 2.0, "last words\n"), (0, 2.0, ""))
+    assert "signal 9" in crashes[0]
+    assert crashes[0].endswith("last words\n")
+
+
+def test_backoff_is_capped():
+    assert supervisor.backoff_seconds(30) == supervisor.BACKOFF_MAX_SECONDS
+
+
+def test_run_child_tells_the_child_it_was_restarted(monkeypatch, tmp_path, capsys):
+    child = tmp_path / "child.py"
+    child.write_text(
+        "import os, sys\n"
+        f"print('restart', os.environ[{RESTART_ENV!r}], file=sys.stderr)\n"
+        "sys.exit(3)\n"
+    )
+    monkeypatch.setattr(supervisor, "MAIN", child)
+    code, ran_for, tail = supervisor.run_child(2)
+    assert code == 3
+    assert ran_for >= 0
+    assert tail == "restart 2\n"
+    assert capsys.readouterr().err == "restart 2\n"